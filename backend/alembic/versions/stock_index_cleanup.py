@@ -0,0 +1,29 @@
+"""Drop stock indexes duplicated by primary keys and the kline unique constraint
+
+Revision ID: stock_index_cleanup
+Revises: 17735885df7b
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = 'stock_index_cleanup'
+down_revision: Union[str, None] = '17735885df7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (symbol, market) is already the primary key of both tables
+    op.drop_index('ix_stock_quotes_symbol_market', table_name='stock_quotes')
+    op.drop_index('ix_stock_fundamentals_symbol_market', table_name='stock_fundamentals')
+    # Kline lookups always filter on market too; uq_stock_kline_symbol_market_interval_datetime
+    # serves them, including ORDER BY datetime DESC LIMIT n via a backward index scan
+    op.drop_index('ix_stock_klines_symbol_interval', table_name='stock_klines')
+
+
+def downgrade() -> None:
+    op.create_index('ix_stock_klines_symbol_interval', 'stock_klines', ['symbol', 'interval'], unique=False)
+    op.create_index('ix_stock_fundamentals_symbol_market', 'stock_fundamentals', ['symbol', 'market'], unique=False)
+    op.create_index('ix_stock_quotes_symbol_market', 'stock_quotes', ['symbol', 'market'], unique=False)
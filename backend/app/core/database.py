@@ -6,6 +6,9 @@ engine = create_async_engine(
     echo=settings.debug,
     pool_size=20,
     max_overflow=10,
+    # 定时任务间隔较长，取出连接前先探活，并定期回收，避免拿到被服务端/代理断开的空闲连接
+    pool_pre_ping=True,
+    pool_recycle=300,
 )
 
 AsyncSessionLocal = async_sessionmaker(
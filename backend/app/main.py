@@ -2,11 +2,15 @@ import logging
 import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.api.v1.router import api_router
+from app.services.llm.provider import llm_provider
 from app.services.market_data.scheduler import start_scheduler, stop_scheduler
+from app.services.market_data.polymarket import polymarket_provider
+from app.services.market_data.aggregator import market_data
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +35,9 @@ async def lifespan(app: FastAPI):
         logger.info("[Shutdown] Stopping market data scheduler...")
         stop_scheduler()
         logger.info("[Shutdown] Market data scheduler stopped")
+    await llm_provider.aclose()
+    await polymarket_provider.close()
+    await market_data.twelvedata.aclose()
 
 
 app = FastAPI(
@@ -39,6 +46,7 @@ app = FastAPI(
     docs_url="/docs" if settings.debug else None,
     redoc_url="/redoc" if settings.debug else None,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
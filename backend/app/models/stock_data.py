@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import String, Float, Integer, BigInteger, DateTime, UniqueConstraint, Index
+from sqlalchemy import String, Float, Integer, BigInteger, DateTime, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from app.models.base import Base, TimestampMixin
@@ -11,9 +11,6 @@ from app.models.base import Base, TimestampMixin
 
 class StockQuote(Base, TimestampMixin):
     __tablename__ = "stock_quotes"
-    __table_args__ = (
-        Index("ix_stock_quotes_symbol_market", "symbol", "market"),
-    )
 
     symbol: Mapped[str] = mapped_column(String(20), primary_key=True)
     market: Mapped[str] = mapped_column(String(10), primary_key=True)
@@ -32,8 +29,8 @@ class StockQuote(Base, TimestampMixin):
 class StockKline(Base, TimestampMixin):
     __tablename__ = "stock_klines"
     __table_args__ = (
+        # 同时作为 get_klines 的查询索引：(symbol, market, interval) 等值 + datetime 反向扫描
         UniqueConstraint("symbol", "market", "interval", "datetime", name="uq_stock_kline_symbol_market_interval_datetime"),
-        Index("ix_stock_klines_symbol_interval", "symbol", "interval"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -54,9 +51,6 @@ class StockKline(Base, TimestampMixin):
 
 class StockFundamental(Base, TimestampMixin):
     __tablename__ = "stock_fundamentals"
-    __table_args__ = (
-        Index("ix_stock_fundamentals_symbol_market", "symbol", "market"),
-    )
 
     symbol: Mapped[str] = mapped_column(String(20), primary_key=True)
     market: Mapped[str] = mapped_column(String(10), primary_key=True)
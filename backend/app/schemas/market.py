@@ -21,7 +21,8 @@ class StockQuote(BaseModel):
 
 
 class KlinePoint(BaseModel):
-    datetime: str
+    # 数据源给出的 ISO 字符串在校验时解析一次；JSON 输出由 pydantic-core 统一序列化为 ISO 8601
+    datetime: datetime
     open: float
     high: float
     low: float
@@ -0,0 +1,116 @@
+"""Numeric core of the Markov chain predictor.
+
+``run`` takes discretized returns and fills the frequency / transition matrix
+buffers in place, computes the n-step matrix inside the caller's ``out`` /
+``tmp`` buffers, then returns the n-step matrix, per-state mean returns,
+expected return and prediction entropy. It is JIT-compiled with Numba when
+available and falls back to an equivalent pure-NumPy implementation otherwise.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _matrix_power_inplace(P: np.ndarray, k: int, out: np.ndarray, tmp: np.ndarray) -> np.ndarray:
+    """P^k by repeated matmul into two ping-pong buffers; returns whichever holds the result."""
+    P = np.ascontiguousarray(P)
+    out[...] = 0
+    np.fill_diagonal(out, 1)
+    for _ in range(k):
+        np.matmul(out, P, out=tmp)
+        out, tmp = tmp, out
+    return out
+
+
+def _run_numpy(
+    returns: np.ndarray,
+    states: np.ndarray,
+    current_state: int,
+    forecast_steps: int,
+    freq: np.ndarray,
+    trans: np.ndarray,
+    out: np.ndarray,
+    tmp: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, float, float]:
+    n = freq.shape[0]
+
+    # Transition counts in one bincount over (from, to) pair indices
+    clipped = np.minimum(states, n - 1)
+    freq[...] = np.bincount(clipped[:-1] * n + clipped[1:], minlength=n * n).reshape(n, n)
+
+    row_sums = freq.sum(axis=1, keepdims=True)
+    row_sums[row_sums == 0] = 1  # avoid division by zero
+    np.divide(freq, row_sums, out=trans)
+
+    n_step_matrix = _matrix_power_inplace(trans, forecast_steps, out, tmp)
+
+    counts = np.bincount(states, minlength=n)[:n]
+    sums = np.bincount(states, weights=returns, minlength=n)[:n]
+    state_means = np.divide(sums, counts, out=np.zeros(n), where=counts > 0)
+
+    predicted_probs = n_step_matrix[current_state]
+    expected_return = float(predicted_probs @ state_means)
+    entropy = float(-np.sum(predicted_probs * np.log2(predicted_probs + 1e-10)))
+    return n_step_matrix, state_means, expected_return, entropy
+
+
+if HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _run_jit(returns, states, current_state, forecast_steps, freq, trans, out, tmp):
+        n = freq.shape[0]
+
+        freq[:, :] = 0
+        for t in range(states.shape[0] - 1):
+            freq[min(states[t], n - 1), min(states[t + 1], n - 1)] += 1
+
+        for i in range(n):
+            row_sum = 0.0
+            for j in range(n):
+                row_sum += freq[i, j]
+            if row_sum == 0:
+                row_sum = 1.0
+            for j in range(n):
+                trans[i, j] = freq[i, j] / row_sum
+
+        n_step_matrix = out
+        for i in range(n):
+            for j in range(n):
+                n_step_matrix[i, j] = 1.0 if i == j else 0.0
+        for _ in range(forecast_steps):
+            for i in range(n):
+                for j in range(n):
+                    acc = 0.0
+                    for k in range(n):
+                        acc += n_step_matrix[i, k] * trans[k, j]
+                    tmp[i, j] = acc
+            n_step_matrix, tmp = tmp, n_step_matrix
+
+        sums = np.zeros(n)
+        counts = np.zeros(n)
+        for t in range(returns.shape[0]):
+            s = states[t]
+            if s < n:
+                sums[s] += returns[t]
+                counts[s] += 1
+        state_means = np.zeros(n)
+        for s in range(n):
+            if counts[s] > 0:
+                state_means[s] = sums[s] / counts[s]
+
+        expected_return = 0.0
+        entropy = 0.0
+        for s in range(n):
+            p = n_step_matrix[current_state, s]
+            expected_return += p * state_means[s]
+            entropy -= p * np.log2(p + 1e-10)
+        return n_step_matrix, state_means, expected_return, entropy
+
+    run = _run_jit
+else:
+    run = _run_numpy
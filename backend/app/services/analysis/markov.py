@@ -1,6 +1,9 @@
 from __future__ import annotations
+import threading
+
 import numpy as np
-from numpy.linalg import matrix_power
+
+from app.services.analysis import _markov_kernel
 
 
 class MarkovPredictor:
@@ -9,6 +12,15 @@ class MarkovPredictor:
     def __init__(self, n_states: int = 5):
         self.n_states = n_states
         self.state_labels = ["大幅下跌", "小幅下跌", "横盘", "小幅上涨", "大幅上涨"]
+        # Quantities that depend only on n_states, computed once
+        self._q_probs = np.linspace(0, 1, n_states + 1)
+        self._max_entropy = float(np.log2(n_states)) if n_states > 1 else 0.0
+        # Preallocated matrix buffers reused across calls; shared, so guarded by a lock
+        self._buf_freq = np.zeros((n_states, n_states), dtype=np.float32)
+        self._buf_trans = np.empty_like(self._buf_freq)
+        self._buf_npow = np.empty_like(self._buf_freq)
+        self._buf_tmp = np.empty_like(self._buf_freq)
+        self._lock = threading.Lock()
 
     def predict(self, prices: list[float], horizon: str) -> dict:
         """
@@ -21,7 +33,12 @@ class MarkovPredictor:
         Returns:
             Complete prediction result with computation log
         """
-        prices_arr = np.array(prices, dtype=float)
+        with self._lock:
+            return self._predict(prices, horizon)
+
+    def _predict(self, prices: list[float], horizon: str) -> dict:
+        # float32 is ample precision for an n-state chain and halves memory traffic
+        prices_arr = np.asarray(prices, dtype=np.float32)
         computation_steps = []
 
         # Step 1: Calculate daily returns
@@ -42,11 +59,11 @@ class MarkovPredictor:
         })
 
         # Step 2: Discretize returns into states using quantiles
-        bin_edges = np.quantile(returns, np.linspace(0, 1, self.n_states + 1))
+        bin_edges = np.quantile(returns, self._q_probs).astype(np.float32)
         # Ensure unique bin edges
         bin_edges = np.unique(bin_edges)
         if len(bin_edges) < self.n_states + 1:
-            bin_edges = np.linspace(returns.min() - 0.001, returns.max() + 0.001, self.n_states + 1)
+            bin_edges = np.linspace(returns.min() - 0.001, returns.max() + 0.001, self.n_states + 1, dtype=np.float32)
 
         states = np.digitize(returns, bin_edges[1:-1])  # 0 to n_states-1
 
@@ -66,13 +83,24 @@ class MarkovPredictor:
             "data": {"state_ranges": state_ranges},
         })
 
-        # Step 3: Build transition frequency matrix
+        # Step 3-8 numeric core: transition counts, normalization, n-step power, state means
         n = min(self.n_states, len(bin_edges) - 1)
-        freq_matrix = np.zeros((n, n))
-        for i in range(len(states) - 1):
-            s_from = min(states[i], n - 1)
-            s_to = min(states[i + 1], n - 1)
-            freq_matrix[s_from][s_to] += 1
+        steps_map = {"3day": 3, "1week": 5, "1month": 22}
+        forecast_steps = steps_map.get(horizon, 5)
+        current_return = returns[-1]
+        current_state = min(int(np.digitize(current_return, bin_edges[1:-1])), n - 1)
+
+        freq_matrix = self._buf_freq[:n, :n]
+        transition_matrix = self._buf_trans[:n, :n]
+        n_step_matrix, state_means_arr, expected_return, entropy = _markov_kernel.run(
+            returns, states, current_state, forecast_steps, freq_matrix, transition_matrix,
+            self._buf_npow[:n, :n], self._buf_tmp[:n, :n],
+        )
+        predicted_probs = n_step_matrix[current_state]
+        state_means = state_means_arr.tolist()
+        predicted_state_probs = dict(zip(self.state_labels[:n], predicted_probs.tolist()))
+        # Buffers are reused by the next call, so materialize each matrix exactly once
+        transition_list = transition_matrix.tolist()
 
         computation_steps.append({
             "step": 3,
@@ -82,27 +110,14 @@ class MarkovPredictor:
             "data": {"frequency_matrix": freq_matrix.tolist()},
         })
 
-        # Step 4: Normalize to get transition probability matrix
-        row_sums = freq_matrix.sum(axis=1, keepdims=True)
-        row_sums[row_sums == 0] = 1  # avoid division by zero
-        transition_matrix = freq_matrix / row_sums
-
         computation_steps.append({
             "step": 4,
             "title": "归一化为转移概率矩阵",
             "description": "将频率矩阵每行归一化，使每行概率之和为1，"
                           "得到马尔可夫转移概率矩阵 P(i→j)。",
-            "data": {"transition_matrix": transition_matrix.tolist()},
+            "data": {"transition_matrix": transition_list},
         })
 
-        # Step 5: Determine forecast horizon steps
-        steps_map = {"3day": 3, "1week": 5, "1month": 22}
-        forecast_steps = steps_map.get(horizon, 5)
-
-        # Step 6: Current state detection
-        current_return = returns[-1]
-        current_state = min(int(np.digitize(current_return, bin_edges[1:-1])), n - 1)
-
         computation_steps.append({
             "step": 5,
             "title": "确定当前状态和预测步数",
@@ -116,10 +131,6 @@ class MarkovPredictor:
             },
         })
 
-        # Step 7: Matrix exponentiation for n-step prediction
-        n_step_matrix = matrix_power(transition_matrix, forecast_steps)
-        predicted_probs = n_step_matrix[current_state]
-
         computation_steps.append({
             "step": 6,
             "title": "矩阵幂运算预测",
@@ -127,31 +138,12 @@ class MarkovPredictor:
                           f"P^{forecast_steps}，得到 {forecast_steps} 步后的状态概率分布。",
             "data": {
                 "n_step_matrix": n_step_matrix.tolist(),
-                "predicted_probs": {
-                    self.state_labels[i]: float(predicted_probs[i])
-                    for i in range(n)
-                },
+                "predicted_probs": predicted_state_probs,
             },
         })
 
-        # Step 8: Map to price predictions
-        state_means = []
-        for s in range(n):
-            mask = states == s
-            if mask.any():
-                state_means.append(float(np.mean(returns[:-1][mask[:-1]] if len(mask) > len(returns[:-1]) else returns[mask[:len(returns)]])))
-            else:
-                state_means.append(0.0)
-
-        # Use properly computed state means
-        for s in range(n):
-            mask = (states == s)
-            indices = np.where(mask)[0]
-            if len(indices) > 0:
-                state_means[s] = float(np.mean(returns[indices]))
-
-        expected_return = np.dot(predicted_probs[:len(state_means)], state_means)
-        current_price = float(prices_arr[-1])
+        # Report the caller's exact price rather than its float32 rounding
+        current_price = float(prices[-1])
 
         # Compound return over forecast period
         predicted_mid = current_price * (1 + expected_return) ** forecast_steps
@@ -159,8 +151,7 @@ class MarkovPredictor:
         predicted_high = current_price * (1 + max(state_means)) ** forecast_steps
 
         # Confidence based on entropy of prediction distribution
-        entropy = -np.sum(predicted_probs * np.log2(predicted_probs + 1e-10))
-        max_entropy = np.log2(n)
+        max_entropy = self._max_entropy if n == self.n_states else float(np.log2(n))
         confidence = float(1 - entropy / max_entropy) if max_entropy > 0 else 0.0
 
         computation_steps.append({
@@ -184,11 +175,8 @@ class MarkovPredictor:
             "current_price": current_price,
             "current_state": self.state_labels[current_state],
             "state_labels": self.state_labels[:n],
-            "transition_matrix": transition_matrix.tolist(),
-            "predicted_state_probs": {
-                self.state_labels[i]: float(predicted_probs[i])
-                for i in range(n)
-            },
+            "transition_matrix": transition_list,
+            "predicted_state_probs": predicted_state_probs,
             "predicted_range": {
                 "low": float(predicted_low),
                 "mid": float(predicted_mid),
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-import traceback
-from typing import AsyncGenerator, List
+import time
+from typing import AsyncGenerator, List, Optional
+import httpx
 import litellm
 from app.config import settings
 
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+except ImportError:
+    h2 = None
+
 logger = logging.getLogger(__name__)
 
+# 流式输出合并窗口：累计字符数达到阈值或距上次输出超过该时间即 flush
+STREAM_FLUSH_CHARS = 64
+STREAM_FLUSH_INTERVAL = 0.02
+
 
 MODEL_CONFIGS = {
     "deepseek": {
@@ -37,13 +49,66 @@ MODEL_CONFIGS = {
     },
 }
 
+# 预先换算为每 token 单价，计费时只需乘法
+for _cfg in MODEL_CONFIGS.values():
+    _cfg["cpt_in"] = _cfg["cost_per_1k_input"] * 1e-3
+    _cfg["cpt_out"] = _cfg["cost_per_1k_output"] * 1e-3
+
+
+@functools.lru_cache(maxsize=1)
+def _available_models(settings_id: int) -> List[dict]:
+    """模型可用性只依赖配置对象，按 id(settings) 缓存；配置重载后调用 cache_clear() 失效"""
+    return [
+        {"key": key, "model": config["model"], "available": bool(config["api_key"]())}
+        for key, config in MODEL_CONFIGS.items()
+    ]
+
 
 class LLMProvider:
+    def __init__(self):
+        # 每个模型的静态调用参数（model / api_key / api_base）只构建一次
+        self._base_kwargs = {}
+        for key, config in MODEL_CONFIGS.items():
+            base = {"model": config["model"], "api_key": config["api_key"]()}
+            if "api_base" in config:
+                base["api_base"] = config["api_base"]
+            self._base_kwargs[key] = base
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """在当前事件循环内惰性创建共享连接池；Celery 任务每次新建事件循环时重建，避免复用已关闭循环上的连接
+
+        litellm 会把包装 aclient_session 的 AsyncOpenAI / httpx 客户端缓存在 in_memory_llm_clients_cache
+        （按 api_key / api_base 等取键，与事件循环无关），换连接池时必须一并清空，否则仍会使用旧循环上的连接。
+        """
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http_loop is not loop:
+            self._http = httpx.AsyncClient(
+                http2=h2 is not None,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=60,
+            )
+            self._http_loop = loop
+            # litellm 通过 aclient_session 复用同一个 AsyncClient，避免每次请求重新握手
+            litellm.aclient_session = self._http
+            litellm.in_memory_llm_clients_cache.flush_cache()
+        return self._http
+
+    async def aclose(self):
+        if self._http is None:
+            return
+        if self._http_loop is asyncio.get_running_loop():
+            await self._http.aclose()
+        if litellm.aclient_session is self._http:
+            litellm.aclient_session = None
+            litellm.in_memory_llm_clients_cache.flush_cache()
+        self._http = None
+        self._http_loop = None
+
     def get_available_models(self) -> List[dict]:
-        return [
-            {"key": key, "model": config["model"], "available": bool(config["api_key"]())}
-            for key, config in MODEL_CONFIGS.items()
-        ]
+        return _available_models(id(settings))
 
     async def chat(
         self,
@@ -57,36 +122,34 @@ class LLMProvider:
             logger.error(f"[LLM] 未知模型: {model_key}, 可用模型: {list(MODEL_CONFIGS.keys())}")
             raise ValueError(f"Unknown model: {model_key}")
 
-        api_key = config["api_key"]()
-        if not api_key:
+        base_kwargs = self._base_kwargs[model_key]
+        if not base_kwargs["api_key"]:
             logger.error(f"[LLM] 模型 {model_key} 的API密钥未配置")
             raise ValueError(f"API key not configured for model: {model_key}")
 
         logger.info(f"[LLM] 调用模型={model_key}, 实际模型={config['model']}, messages数量={len(messages)}")
         logger.debug(f"[LLM] 请求参数: temperature={temperature}, max_tokens={max_tokens}")
 
-        kwargs = {
-            "model": config["model"],
+        kwargs = base_kwargs | {
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
-            "api_key": api_key,
         }
-        if "api_base" in config:
-            kwargs["api_base"] = config["api_base"]
-            logger.debug(f"[LLM] 使用自定义API地址: {config['api_base']}")
+        if "api_base" in base_kwargs:
+            logger.debug(f"[LLM] 使用自定义API地址: {base_kwargs['api_base']}")
 
+        self._get_client()
         try:
             response = await litellm.acompletion(**kwargs)
-        except Exception as e:
-            logger.error(f"[LLM] 调用失败 模型={model_key}: {str(e)}\n{traceback.format_exc()}")
+        except Exception:
+            logger.exception("[LLM] 调用失败 模型=%s", model_key)
             raise
 
         usage = response.usage
         content = response.choices[0].message.content
 
-        input_cost = (usage.prompt_tokens / 1000) * config["cost_per_1k_input"]
-        output_cost = (usage.completion_tokens / 1000) * config["cost_per_1k_output"]
+        input_cost = usage.prompt_tokens * config["cpt_in"]
+        output_cost = usage.completion_tokens * config["cpt_out"]
 
         logger.info(f"[LLM] 调用成功 模型={model_key}, prompt_tokens={usage.prompt_tokens}, "
                    f"completion_tokens={usage.completion_tokens}, cost=${input_cost + output_cost:.6f}")
@@ -112,40 +175,49 @@ class LLMProvider:
             logger.error(f"[LLM Stream] 未知模型: {model_key}")
             raise ValueError(f"Unknown model: {model_key}")
 
-        api_key = config["api_key"]()
-        if not api_key:
+        base_kwargs = self._base_kwargs[model_key]
+        if not base_kwargs["api_key"]:
             logger.error(f"[LLM Stream] 模型 {model_key} 的API密钥未配置")
             raise ValueError(f"API key not configured for model: {model_key}")
 
         logger.info(f"[LLM Stream] 开始流式调用 模型={model_key}, 实际模型={config['model']}")
 
-        kwargs = {
-            "model": config["model"],
+        kwargs = base_kwargs | {
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
-            "api_key": api_key,
             "stream": True,
         }
-        if "api_base" in config:
-            kwargs["api_base"] = config["api_base"]
 
+        self._get_client()
         try:
             response = await litellm.acompletion(**kwargs)
-        except Exception as e:
-            logger.error(f"[LLM Stream] 流式调用初始化失败 模型={model_key}: {str(e)}\n{traceback.format_exc()}")
+        except Exception:
+            logger.exception("[LLM Stream] 流式调用初始化失败 模型=%s", model_key)
             raise
 
         chunk_count = 0
+        buf: List[str] = []
+        buf_len = 0
+        last_flush = time.monotonic()
         try:
             async for chunk in response:
                 delta = chunk.choices[0].delta
                 if delta and delta.content:
                     chunk_count += 1
-                    yield delta.content
+                    buf.append(delta.content)
+                    buf_len += len(delta.content)
+                    now = time.monotonic()
+                    if buf_len >= STREAM_FLUSH_CHARS or now - last_flush > STREAM_FLUSH_INTERVAL:
+                        yield "".join(buf)
+                        buf.clear()
+                        buf_len = 0
+                        last_flush = now
+            if buf:
+                yield "".join(buf)
             logger.info(f"[LLM Stream] 流式调用完成 模型={model_key}, chunks={chunk_count}")
-        except Exception as e:
-            logger.error(f"[LLM Stream] 流式响应处理失败 (已接收 {chunk_count} chunks): {str(e)}\n{traceback.format_exc()}")
+        except Exception:
+            logger.exception("[LLM Stream] 流式响应处理失败 (已接收 %d chunks)", chunk_count)
             raise
 
 
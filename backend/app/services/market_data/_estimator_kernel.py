@@ -0,0 +1,204 @@
+"""Numeric core of the kline-based fundamentals estimator.
+
+``kline_stats`` takes chronologically ordered close and volume arrays and
+returns ``(volatility, return_60d, ma20, ma60, avg_volume)`` in one pass over
+the window. It is JIT-compiled with Numba when available and falls back to an
+equivalent vectorized NumPy implementation otherwise. ``RollingKlineStats``
+keeps the same statistics up to date as new bars arrive for a symbol.
+"""
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime
+from math import sqrt
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# sqrt(252): annualize a daily-return standard deviation
+ANNUALIZATION = 252 ** 0.5
+
+
+def _kline_stats_numpy(closes: np.ndarray, volumes: np.ndarray) -> tuple[float, float, float, float, float]:
+    n = closes.shape[0]
+    latest_close = float(closes[-1])
+
+    # Zero prices raise (FloatingPointError) like the JIT path's ZeroDivisionError instead of yielding inf
+    with np.errstate(divide="raise", invalid="raise"):
+        if n >= 30:
+            recent_closes = closes[-30:]
+            returns = np.diff(recent_closes) / recent_closes[:-1]
+            volatility = float(returns.std(ddof=1)) * ANNUALIZATION
+        else:
+            volatility = 0.0
+
+        return_60d = (latest_close / float(closes[-60]) - 1) * 100 if n >= 60 else 0.0
+
+    ma20 = float(closes[-20:].mean()) if n >= 20 else latest_close
+    ma60 = float(closes[-60:].mean()) if n >= 60 else latest_close
+
+    avg_volume = 0.0
+    if n >= 20:
+        recent_volumes = volumes[-20:]
+        recent_volumes = recent_volumes[recent_volumes != 0]
+        avg_volume = float(recent_volumes.mean()) if recent_volumes.size else 0.0
+
+    return volatility, return_60d, ma20, ma60, avg_volume
+
+
+if HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _kline_stats_jit(closes, volumes):
+        n = closes.shape[0]
+        latest_close = closes[n - 1]
+
+        # Welford: mean / variance of the last 29 daily returns in a single pass
+        volatility = 0.0
+        if n >= 30:
+            count = 0
+            m = 0.0
+            m2 = 0.0
+            for i in range(n - 29, n):
+                r = closes[i] / closes[i - 1] - 1.0
+                count += 1
+                delta = r - m
+                m += delta / count
+                m2 += delta * (r - m)
+            volatility = np.sqrt(m2 / (count - 1)) * 15.874507866387544
+
+        return_60d = 0.0
+        ma60 = latest_close
+        if n >= 60:
+            return_60d = (latest_close / closes[n - 60] - 1.0) * 100.0
+            total = 0.0
+            for i in range(n - 60, n):
+                total += closes[i]
+            ma60 = total / 60.0
+
+        ma20 = latest_close
+        avg_volume = 0.0
+        if n >= 20:
+            total = 0.0
+            vol_total = 0.0
+            vol_count = 0
+            for i in range(n - 20, n):
+                total += closes[i]
+                if volumes[i] != 0.0:
+                    vol_total += volumes[i]
+                    vol_count += 1
+            ma20 = total / 20.0
+            if vol_count > 0:
+                avg_volume = vol_total / vol_count
+
+        return volatility, return_60d, ma20, ma60, avg_volume
+
+    kline_stats = _kline_stats_jit
+else:
+    kline_stats = _kline_stats_numpy
+
+
+class RollingKlineStats:
+    """``kline_stats`` maintained incrementally over the last ``WINDOW`` bars.
+
+    Built from a full window (at least ``WINDOW`` bars), then ``extend`` pushes only
+    the bars newer than the last one seen, updating running sums in O(1) per bar.
+    Running sums are recomputed from the window every ``RESYNC_EVERY`` pushes so
+    floating-point drift cannot accumulate.
+    """
+
+    WINDOW = 60
+    RESYNC_EVERY = 256
+
+    __slots__ = (
+        "_closes", "_volumes", "_returns", "_datetimes", "_pushes",
+        "_sum20", "_sum60", "_ret_sum", "_ret_sumsq", "_vol_sum", "_vol_count",
+    )
+
+    def __init__(self, closes: list[float], volumes: list[float], datetimes: list[datetime]):
+        self._closes = deque(closes[-self.WINDOW:], maxlen=self.WINDOW)
+        self._volumes = deque(volumes[-20:], maxlen=20)
+        self._datetimes = deque(datetimes[-self.WINDOW:], maxlen=self.WINDOW)
+        self._pushes = 0
+        self._resync()
+
+    def _resync(self) -> None:
+        closes = list(self._closes)
+        self._sum60 = sum(closes)
+        self._sum20 = sum(closes[-20:])
+        returns = [closes[i] / closes[i - 1] - 1 for i in range(len(closes) - 29, len(closes))]
+        self._returns = deque(returns, maxlen=29)
+        self._ret_sum = sum(returns)
+        self._ret_sumsq = sum(r * r for r in returns)
+        volumes = [v for v in self._volumes if v]
+        self._vol_sum = sum(volumes)
+        self._vol_count = len(volumes)
+
+    def _push(self, close: float, volume: float, dt: datetime) -> None:
+        closes = self._closes
+        r = close / closes[-1] - 1
+        old_close_60 = closes[0]
+        old_close_20 = closes[-20]
+        old_r = self._returns[0]
+        old_volume = self._volumes[0]
+
+        closes.append(close)
+        self._sum60 += close - old_close_60
+        self._sum20 += close - old_close_20
+        self._returns.append(r)
+        self._ret_sum += r - old_r
+        self._ret_sumsq += r * r - old_r * old_r
+        self._volumes.append(volume)
+        if old_volume:
+            self._vol_sum -= old_volume
+            self._vol_count -= 1
+        if volume:
+            self._vol_sum += volume
+            self._vol_count += 1
+        self._datetimes.append(dt)
+
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0:
+            self._resync()
+
+    def extend(self, kline_data: list) -> bool:
+        """Push bars of ascending ``kline_data`` newer than the last one seen.
+
+        Returns False when the cached window cannot be continued: the last seen bar
+        is missing or was revised, or the window's first bar no longer lines up
+        (bars inserted, or history re-adjusted e.g. by forward price adjustment).
+        The caller then recomputes from scratch.
+        """
+        last_dt = self._datetimes[-1]
+        for i in range(len(kline_data) - 1, -1, -1):
+            k = kline_data[i]
+            if k.datetime > last_dt:
+                continue
+            if k.datetime < last_dt or k.close != self._closes[-1] or (k.volume or 0) != self._volumes[-1]:
+                return False
+            first = i - (self.WINDOW - 1)
+            if first < 0:
+                return False
+            anchor = kline_data[first]
+            if anchor.datetime != self._datetimes[0] or anchor.close != self._closes[0]:
+                return False
+            for new in kline_data[i + 1:]:
+                self._push(new.close, new.volume or 0, new.datetime)
+            return True
+        return False
+
+    @property
+    def latest_close(self) -> float:
+        return self._closes[-1]
+
+    def stats(self) -> tuple[float, float, float, float, float]:
+        n = len(self._returns)
+        variance = (self._ret_sumsq - self._ret_sum * self._ret_sum / n) / (n - 1)
+        volatility = sqrt(max(variance, 0.0)) * ANNUALIZATION
+        return_60d = (self._closes[-1] / self._closes[0] - 1) * 100
+        avg_volume = self._vol_sum / self._vol_count if self._vol_count else 0.0
+        return volatility, return_60d, self._sum20 / 20, self._sum60 / self.WINDOW, avg_volume
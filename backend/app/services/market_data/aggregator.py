@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
-from functools import partial
+import time
 from typing import Optional, List
 import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from cachetools import LRUCache, TTLCache
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
+from app.core.database import AsyncSessionLocal
 from app.schemas.market import StockQuote, KlinePoint, FundamentalData
+from app.services.market_data.akshare_provider import run_akshare
 from app.services.market_data.base import MarketDataProvider
+from app.services.market_data.cache import CacheService
 from app.services.market_data.twelvedata import TwelveDataProvider
 from app.services.market_data.tushare_provider import TuShareProvider
 from app.services.market_data.repository import StockDataRepository
@@ -18,14 +23,51 @@ from app.services.market_data.estimator import MarketDataEstimator
 logger = logging.getLogger(__name__)
 
 QUOTE_FRESHNESS_MINUTES = 5
-KLINE_FRESHNESS_MINUTES = {
-    "1min": 1,
-    "5min": 5,
-    "1day": 60,
-    "1week": 60,
-    "1month": 60,
+# K线缓存时长按数据更新节奏分档：周线/月线每周/每月才变化一次，不必与日线同频刷新
+KLINE_TTL_SECONDS = {
+    "1min": 30,
+    "5min": 120,
+    "15min": 300,
+    "30min": 600,
+    "60min": 1800,
+    "1day": 4 * 3600,
+    "1week": 24 * 3600,
+    "1month": 7 * 24 * 3600,
 }
+KLINE_FRESHNESS_MINUTES = {interval: max(ttl // 60, 1) for interval, ttl in KLINE_TTL_SECONDS.items()}
 FUNDAMENTAL_FRESHNESS_HOURS = 24
+# 批量刷新时对数据源的最大并发请求数
+QUOTE_REFRESH_CONCURRENCY = 10
+
+# stale-while-revalidate：过了新鲜期后仍可直接返回旧值的时间窗口，期间后台刷新
+QUOTE_STALE_SECONDS = 600
+FUNDAMENTAL_STALE_SECONDS = 24 * 3600
+# 代码搜索结果（代码、名称、交易所）几乎不变，按查询缓存一天
+SEARCH_CACHE_SECONDS = 24 * 3600
+SEARCH_L1_SECONDS = 300
+FUNDAMENTALS_L1_SECONDS = 3600
+CN_NAME_HASH_KEY = "stock:names:cn"
+REDIS_MAX_CONNECTIONS = 64
+# Redis hash 之前的进程内一级缓存，有界以免长期运行时无限增长
+_CN_NAME_CACHE: LRUCache = LRUCache(maxsize=4096)
+
+# 最近被读取过的行情：sorted set，member 为 "{market}:{symbol}"，score 为最近读取时间；
+# 定时任务只高频刷新窗口内被读过的代码，其余代码低频刷新
+HOT_QUOTES_KEY = "quote:lastread"
+HOT_QUOTE_WINDOW_SECONDS = 15 * 60
+# 同一进程内同一代码在该时间内只上报一次读取，避免每次读取都写 Redis
+HOT_QUOTE_MARK_INTERVAL = 60
+
+# 代码后缀 -> 市场；无后缀或未知后缀按美股处理
+_SUFFIX_MARKET = {"SH": "cn", "SZ": "cn", "HK": "hk"}
+
+
+# 缓存序列化统一走 pydantic-core：每种模型一个 TypeAdapter，直接在 Rust 侧序列化为 bytes / 从 bytes 解析，
+# 不经过 model_dump 产生的中间 dict
+_QUOTE_ADAPTER = TypeAdapter(StockQuote)
+_KLINES_ADAPTER = TypeAdapter(List[KlinePoint])
+_FUNDAMENTALS_ADAPTER = TypeAdapter(FundamentalData)
+_SEARCH_ADAPTER = TypeAdapter(List[dict])
 
 
 class MarketDataAggregator:
@@ -33,25 +75,76 @@ class MarketDataAggregator:
         self.twelvedata = TwelveDataProvider()
         self.tushare = TuShareProvider()
         self._redis: Optional[aioredis.Redis] = None
+        self._redis_lock = asyncio.Lock()
+        self.cache = CacheService(self._get_redis)
+        # L1 进程内缓存：热门代码的亚秒级重复请求不再访问 Redis
+        self._quote_l1: TTLCache = TTLCache(maxsize=512, ttl=5)
+        self._kline_l1: TTLCache = TTLCache(maxsize=256, ttl=5)
+        # 搜索结果与基本面变化很慢：自动补全的重复查询、看板反复渲染直接命中进程内缓存
+        self._search_l1: TTLCache = TTLCache(maxsize=512, ttl=SEARCH_L1_SECONDS)
+        self._fundamentals_l1: TTLCache = TTLCache(maxsize=256, ttl=FUNDAMENTALS_L1_SECONDS)
+        self._read_marks: TTLCache = TTLCache(maxsize=4096, ttl=HOT_QUOTE_MARK_INTERVAL)
 
     async def _get_redis(self) -> aioredis.Redis:
         if self._redis is None:
-            self._redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+            async with self._redis_lock:
+                if self._redis is None:
+                    # 不解码响应：缓存值是 JSON 字节，直接交给 pydantic 解析
+                    self._redis = aioredis.from_url(
+                        settings.redis_url,
+                        max_connections=REDIS_MAX_CONNECTIONS,
+                        health_check_interval=30,
+                        socket_keepalive=True,
+                    )
         return self._redis
 
+    async def _with_session(self, use_db: bool, fn, *args):
+        """缓存刷新可能在请求结束后于后台执行，因此使用独立的 DB 会话"""
+        if not use_db:
+            return await fn(*args, None)
+        async with AsyncSessionLocal() as session:
+            result = await fn(*args, session)
+            # 仓库写方法不自行提交；写库失败只记录日志，不影响已取得的数据
+            try:
+                await session.commit()
+            except Exception as e:
+                logger.error(f"[DB] Failed to commit: {e}")
+                await session.rollback()
+            return result
+
+    async def _get_cn_name(self, code: str) -> Optional[str]:
+        """A股名称几乎不变：进程内 dict → Redis hash → AKShare 逐级查找"""
+        name = _CN_NAME_CACHE.get(code)
+        if name:
+            return name
+
+        redis = await self._get_redis()
+        raw = await redis.hget(CN_NAME_HASH_KEY, code)
+        name = raw.decode() if raw else None
+        if not name:
+            import akshare as ak
+            info = await run_akshare(ak.stock_individual_info_em, symbol=code)
+            if info is not None and not info.empty:
+                found = info.iloc[0].get("股票名称") or info.iloc[0].get("名称")
+                if found:
+                    name = str(found)
+                    await redis.hset(CN_NAME_HASH_KEY, code, name)
+
+        if name:
+            _CN_NAME_CACHE[code] = name
+        return name
+
     def _get_provider(self, market: str) -> MarketDataProvider:
         if market in ("cn", "hk"):
             return self.tushare
         return self.twelvedata
 
     def _detect_market(self, symbol: str) -> str:
-        symbol_upper = symbol.upper()
-        if symbol_upper.endswith(".SH") or symbol_upper.endswith(".SZ"):
-            return "cn"
-        if symbol_upper.endswith(".HK"):
-            return "hk"
         if "/" in symbol:
             return "commodity"
+        dot = symbol.rfind(".")
+        if dot >= 0:
+            return _SUFFIX_MARKET.get(symbol[dot + 1:].upper(), "us")
         return "us"
 
     async def get_quote(
@@ -64,19 +157,72 @@ class MarketDataAggregator:
         if not market:
             market = self._detect_market(symbol)
 
+        l1_key = (symbol, market)
+        await self._mark_read(symbol, market)
+        if force_refresh:
+            quote = await self._resolve_quote(symbol, market, db, force_refresh=True)
+            await self.cache.set_many([self._quote_cache_entry(quote, market, symbol)], QUOTE_STALE_SECONDS)
+        else:
+            quote = self._quote_l1.get(l1_key)
+            if quote is not None:
+                return quote
+            quote = await self.cache.get_or_set_swr(
+                f"quote:{market}:{symbol}",
+                lambda: self._with_session(db is not None, self._resolve_quote, symbol, market),
+                ttl=QUOTE_FRESHNESS_MINUTES * 60,
+                stale_ttl=QUOTE_STALE_SECONDS,
+                dumps=_QUOTE_ADAPTER.dump_json,
+                loads=_QUOTE_ADAPTER.validate_json,
+            )
+
+        self._quote_l1[l1_key] = quote
+        return quote
+
+    async def _mark_read(self, symbol: str, market: str) -> None:
+        """记录代码最近被读取的时间，供定时任务挑选热门代码；失败不影响读取"""
+        key = (symbol, market)
+        if key in self._read_marks:
+            return
+        self._read_marks[key] = True
+        try:
+            redis = await self._get_redis()
+            await redis.zadd(HOT_QUOTES_KEY, {f"{market}:{symbol}": time.time()})
+        except Exception as e:
+            logger.warning(f"[Cache] Failed to mark quote read {symbol}: {e}")
+
+    async def get_hot_symbols(self, window_seconds: int = HOT_QUOTE_WINDOW_SECONDS) -> List[dict]:
+        """返回最近 window_seconds 内被读取过的代码，顺带清理窗口外的记录"""
+        redis = await self._get_redis()
+        cutoff = time.time() - window_seconds
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(HOT_QUOTES_KEY, "-inf", cutoff)
+            pipe.zrange(HOT_QUOTES_KEY, 0, -1)
+            _, members = await pipe.execute()
+
+        symbols = []
+        for member in members:
+            market, _, symbol = member.decode().partition(":")
+            symbols.append({"symbol": symbol, "market": market})
+        return symbols
+
+    @staticmethod
+    def _quote_cache_entry(quote: StockQuote, market: str, symbol: str) -> tuple[str, bytes, int]:
+        return f"quote:{market}:{symbol}", _QUOTE_ADAPTER.dump_json(quote), QUOTE_FRESHNESS_MINUTES * 60
+
+    async def _resolve_quote(
+        self,
+        symbol: str,
+        market: str,
+        db: Optional[AsyncSession] = None,
+        force_refresh: bool = False,
+    ) -> StockQuote:
+        """DB → API 级联获取行情（不写 Redis，由调用方负责缓存）"""
         if db:
             repo = StockDataRepository(db)
             if not force_refresh:
                 cached_quote = await repo.get_quote(symbol, market)
                 if cached_quote:
                     logger.info(f"[DB] Cache hit for quote: {symbol}")
-                    redis = await self._get_redis()
-                    cache_key = f"quote:{market}:{symbol}"
-                    await redis.set(
-                        cache_key,
-                        cached_quote.model_dump_json(),
-                        ex=QUOTE_FRESHNESS_MINUTES * 60,
-                    )
                     return cached_quote
 
         provider = self._get_provider(market)
@@ -98,10 +244,6 @@ class MarketDataAggregator:
             except Exception as e:
                 logger.error(f"[DB] Failed to save quote: {e}")
 
-        redis = await self._get_redis()
-        cache_key = f"quote:{market}:{symbol}"
-        await redis.set(cache_key, quote.model_dump_json(), ex=QUOTE_FRESHNESS_MINUTES * 60)
-
         return quote
 
     async def get_kline(
@@ -116,8 +258,43 @@ class MarketDataAggregator:
         if not market:
             market = self._detect_market(symbol)
 
+        cache_key = f"kline:{market}:{symbol}:{interval}:{outputsize}"
+        ttl = KLINE_TTL_SECONDS.get(interval, 3600)
+
+        l1_key = (symbol, market, interval, outputsize)
+        if force_refresh:
+            kline = await self._resolve_kline(symbol, market, interval, outputsize, db, force_refresh=True)
+            await self.cache.set_many([(cache_key, _KLINES_ADAPTER.dump_json(kline), ttl)], ttl)
+        else:
+            kline = self._kline_l1.get(l1_key)
+            if kline is not None:
+                return kline
+            kline = await self.cache.get_or_set_swr(
+                cache_key,
+                lambda: self._with_session(
+                    db is not None, self._resolve_kline, symbol, market, interval, outputsize
+                ),
+                ttl=ttl,
+                stale_ttl=ttl,
+                dumps=_KLINES_ADAPTER.dump_json,
+                loads=_KLINES_ADAPTER.validate_json,
+            )
+
+        self._kline_l1[l1_key] = kline
+        return kline
+
+    async def _resolve_kline(
+        self,
+        symbol: str,
+        market: str,
+        interval: str,
+        outputsize: int,
+        db: Optional[AsyncSession] = None,
+        force_refresh: bool = False,
+    ) -> List[KlinePoint]:
+        """DB → API 级联获取K线（不写 Redis，由调用方负责缓存）"""
+        repo = StockDataRepository(db) if db else None
         if db and not force_refresh:
-            repo = StockDataRepository(db)
             freshness = KLINE_FRESHNESS_MINUTES.get(interval, 60)
             from datetime import datetime, timezone, timedelta
             start_time = datetime.now(timezone.utc) - timedelta(minutes=freshness)
@@ -129,13 +306,6 @@ class MarketDataAggregator:
             )
             if cached_klines and len(cached_klines) >= outputsize:
                 logger.info(f"[DB] Cache hit for kline: {symbol} {interval}")
-                redis = await self._get_redis()
-                cache_key = f"kline:{market}:{symbol}:{interval}:{outputsize}"
-                await redis.set(
-                    cache_key,
-                    json.dumps([k.model_dump() for k in cached_klines]),
-                    ex=freshness * 60,
-                )
                 return cached_klines
 
         provider = self._get_provider(market)
@@ -156,56 +326,76 @@ class MarketDataAggregator:
                 logger.info(f"[DB] Saved klines to DB: {symbol} {interval}")
 
                 if market == "cn" and kline:
-                    from datetime import datetime
                     try:
-                        code = symbol.split(".")[0]
-                        import akshare as ak
-                        info = await asyncio.get_event_loop().run_in_executor(
-                            None, partial(ak.stock_individual_info_em, symbol=code)
-                        )
-                        if info is not None and not info.empty:
-                            name = info.iloc[0].get("股票名称") or info.iloc[0].get("名称")
-                            if name:
-                                from app.schemas.market import StockQuote
-                                quote = StockQuote(
-                                    symbol=symbol,
-                                    name=str(name),
-                                    market=market,
-                                    price=kline[-1].close if kline else 0,
-                                )
-                                await repo.save_quote(quote)
-                                logger.info(f"[DB] Saved quote name for {symbol}: {name}")
+                        name = await self._get_cn_name(symbol.split(".")[0])
+                        if name:
+                            quote = StockQuote(
+                                symbol=symbol,
+                                name=name,
+                                market=market,
+                                price=kline[-1].close if kline else 0,
+                            )
+                            await repo.save_quote(quote)
+                            logger.info(f"[DB] Saved quote name for {symbol}: {name}")
                     except Exception as e:
                         logger.warning(f"[DB] Failed to save quote name for {symbol}: {e}")
             except Exception as e:
                 logger.error(f"[DB] Failed to save klines: {e}")
 
-        ttl_map = {"1min": 60, "5min": 60, "1day": 14400, "1week": 14400, "1month": 14400}
-        ttl = ttl_map.get(interval, 3600)
-        redis = await self._get_redis()
-        cache_key = f"kline:{market}:{symbol}:{interval}:{outputsize}"
-        await redis.set(cache_key, json.dumps([k.model_dump() for k in kline]), ex=ttl)
-
         return kline
 
     async def search(self, query: str, market: Optional[str] = None) -> List[dict]:
-        results = []
-        if not market or market == "cn":
-            try:
-                cn_results = await self.tushare.search(query)
-                results.extend(cn_results)
-            except Exception:
-                pass
+        query = query.strip()
+        cache_key = f"search:{market or 'all'}:{query}"
+        results = self._search_l1.get(cache_key)
+        if results is not None:
+            return results
 
-        if not market or market in ("us", "hk", "commodity"):
+        # Redis 只是加速层：不可用时直接查询数据源
+        try:
+            redis = await self._get_redis()
+            raw = await redis.get(cache_key)
+        except RedisError as e:
+            logger.warning(f"[Cache] Search cache unavailable, querying sources: {e}")
+            raw = None
+        if raw is not None:
+            results = _SEARCH_ADAPTER.validate_json(raw)
+            self._search_l1[cache_key] = results
+            return results
+
+        results, complete = await self._search_sources(query, market)
+        # 有数据源失败时结果不完整；空结果也可能来自限流报错。两种情况都不写缓存，下次查询重试
+        if complete and results:
+            self._search_l1[cache_key] = results
             try:
-                td_results = await self.twelvedata.search(query)
-                results.extend(td_results)
-            except Exception:
-                pass
-
+                await self.cache.set_many([(cache_key, _SEARCH_ADAPTER.dump_json(results), SEARCH_CACHE_SECONDS)])
+            except RedisError as e:
+                logger.warning(f"[Cache] Failed to cache search results: {e}")
         return results
 
+    async def _search_sources(self, query: str, market: Optional[str]) -> tuple[List[dict], bool]:
+        async def _empty() -> List[dict]:
+            return []
+
+        want_cn = not market or market == "cn"
+        want_td = not market or market in ("us", "hk", "commodity")
+
+        # 两个数据源相互独立，并发查询
+        outcomes = await asyncio.gather(
+            self.tushare.search(query) if want_cn else _empty(),
+            self.twelvedata.search(query) if want_td else _empty(),
+            return_exceptions=True,
+        )
+
+        results = []
+        complete = True
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                complete = False
+            else:
+                results.extend(outcome)
+        return results, complete
+
     async def get_fundamentals(
         self,
         symbol: str,
@@ -216,12 +406,46 @@ class MarketDataAggregator:
         if not market:
             market = self._detect_market(symbol)
 
+        cache_key = f"fundamentals:{market}:{symbol}"
+        ttl = FUNDAMENTAL_FRESHNESS_HOURS * 3600
+
+        if force_refresh:
+            data = await self._resolve_fundamentals(symbol, market, db, force_refresh=True)
+            if data:
+                await self.cache.set_many([(cache_key, _FUNDAMENTALS_ADAPTER.dump_json(data), ttl)], FUNDAMENTAL_STALE_SECONDS)
+                self._fundamentals_l1[cache_key] = data
+            return data
+
+        data = self._fundamentals_l1.get(cache_key)
+        if data is not None:
+            return data
+
+        data = await self.cache.get_or_set_swr(
+            cache_key,
+            lambda: self._with_session(db is not None, self._resolve_fundamentals, symbol, market),
+            ttl=ttl,
+            stale_ttl=FUNDAMENTAL_STALE_SECONDS,
+            dumps=_FUNDAMENTALS_ADAPTER.dump_json,
+            loads=_FUNDAMENTALS_ADAPTER.validate_json,
+        )
+        if data is not None:
+            self._fundamentals_l1[cache_key] = data
+        return data
+
+    async def _resolve_fundamentals(
+        self,
+        symbol: str,
+        market: str,
+        db: Optional[AsyncSession] = None,
+        force_refresh: bool = False,
+    ) -> Optional[FundamentalData]:
+        """DB → API → 行情估算 级联获取基本面（不写 Redis，由调用方负责缓存）"""
+        repo = StockDataRepository(db) if db else None
         if db and not force_refresh:
-            repo = StockDataRepository(db)
             cached_data = await repo.get_fundamentals(symbol, market)
             if cached_data:
                 logger.info(f"[DB] Cache hit for fundamentals: {symbol}")
-                return FundamentalData(**cached_data)
+                return FundamentalData.model_construct(**cached_data)
 
         provider = self._get_provider(market)
         try:
@@ -232,7 +456,7 @@ class MarketDataAggregator:
                 cached_data = await repo.get_fundamentals(symbol, market)
                 if cached_data:
                     logger.warning(f"[API] Failed, using stale DB data: {symbol}")
-                    return FundamentalData(**cached_data)
+                    return FundamentalData.model_construct(**cached_data)
             logger.warning(f"[API] Failed to get fundamentals: {e}")
             data = None
 
@@ -240,21 +464,13 @@ class MarketDataAggregator:
         if not data:
             logger.info(f"[Estimator] Attempting to estimate fundamentals from market data: {symbol}")
             try:
-                # 获取实时行情
+                # 一次调用同时获取实时行情和K线数据（至少60天用于估算）
                 quote = None
-                try:
-                    quote = await self.get_quote(symbol, market, db)
-                except Exception as qe:
-                    logger.warning(f"[Estimator] Failed to get quote: {qe}")
-
-                # 获取K线数据（至少60天用于估算）
                 kline_data = None
                 try:
-                    kline_data = await self.get_kline(
-                        symbol, market, interval="1day", outputsize=100, db=db
-                    )
-                except Exception as ke:
-                    logger.warning(f"[Estimator] Failed to get kline: {ke}")
+                    quote, kline_data = await provider.get_market_context(symbol, 100)
+                except Exception as ce:
+                    logger.warning(f"[Estimator] Failed to get market context: {ce}")
 
                 # 使用估算器生成基本面估算
                 if quote or kline_data:
@@ -277,41 +493,108 @@ class MarketDataAggregator:
 
         return data
 
+    async def _fetch_quotes(self, items: List[tuple[str, str]]) -> dict:
+        """并发从数据源拉取行情，返回 {(symbol, market): StockQuote | Exception}
+
+        多个 A 股代码先合并成一次 TuShare 批量请求，批量结果中缺失的（ETF 等）再逐个请求，
+        逐个请求受信号量限制以免触发数据源限流。
+        """
+        results: dict = {}
+
+        cn_symbols = list(dict.fromkeys(symbol for symbol, market in items if market == "cn"))
+        if len(cn_symbols) > 1:
+            try:
+                for quote in await self.tushare.get_quotes_batch(cn_symbols):
+                    results[(quote.symbol, "cn")] = quote
+            except Exception as e:
+                logger.warning(f"[Batch] CN batch quote failed, falling back to per-symbol: {e}")
+
+        semaphore = asyncio.Semaphore(QUOTE_REFRESH_CONCURRENCY)
+
+        async def _one(symbol: str, market: str) -> StockQuote:
+            async with semaphore:
+                return await self._get_provider(market).get_quote(symbol)
+
+        pending = [key for key in dict.fromkeys(items) if key not in results]
+        outcomes = await asyncio.gather(*(_one(*key) for key in pending), return_exceptions=True)
+        results.update(zip(pending, outcomes))
+        return results
+
+    async def _refresh_quotes(
+        self, items: List[tuple[str, str]], db: AsyncSession
+    ) -> tuple[List[StockQuote], List[tuple[str, BaseException]]]:
+        """批量强制刷新：并发拉取，一次批量 upsert 写库，一次 pipeline 写 Redis
+
+        拉取阶段不使用 db，会话只在全部拉取完成后才用于查询旧数据和写库，不在外部请求期间占用连接。
+        """
+        fetched = await self._fetch_quotes(items)
+        repo = StockDataRepository(db)
+
+        # 拉取失败的代码用一次批量查询取回库中旧数据，而不是逐个 SELECT
+        failed_keys = [key for key, outcome in fetched.items() if isinstance(outcome, BaseException)]
+        stale_quotes = await repo.get_quotes_bulk(failed_keys) if failed_keys else {}
+
+        refreshed = []
+        failed = []
+        cache_entries = []
+        to_save = []
+        for symbol, market in items:
+            outcome = fetched[(symbol, market)]
+            if isinstance(outcome, BaseException):
+                cached_quote = stale_quotes.get((symbol, market))
+                if not cached_quote:
+                    failed.append((symbol, outcome))
+                    continue
+                logger.warning(f"[API] Failed, using stale DB data: {symbol}")
+                quote = cached_quote
+            else:
+                quote = outcome
+                to_save.append(quote)
+
+            refreshed.append(quote)
+            cache_entries.append(self._quote_cache_entry(quote, market, symbol))
+            self._quote_l1[(symbol, market)] = quote
+
+        # 新拉取的行情合并为一次批量 upsert；放在 SAVEPOINT 中，失败时不破坏调用方的事务，由调用方统一提交
+        try:
+            async with db.begin_nested():
+                await repo.upsert_quotes_bulk(to_save)
+        except Exception as e:
+            logger.error(f"[DB] Failed to save quotes: {e}")
+
+        if cache_entries:
+            await self.cache.set_many(cache_entries, QUOTE_STALE_SECONDS)
+        return refreshed, failed
+
     async def batch_refresh_quotes(
         self, symbols: List[dict], db: AsyncSession
     ) -> List[StockQuote]:
-        results = []
-        for item in symbols:
-            symbol = item.get("symbol")
-            market = item.get("market") or self._detect_market(symbol)
-            try:
-                quote = await self.get_quote(symbol, market, db, force_refresh=True)
-                results.append(quote)
-            except Exception as e:
-                logger.error(f"[Batch] Failed to refresh {symbol}: {e}")
+        items = [
+            (item.get("symbol"), item.get("market") or self._detect_market(item.get("symbol")))
+            for item in symbols
+        ]
+        results, failed = await self._refresh_quotes(items, db)
+        for symbol, e in failed:
+            logger.error(f"[Batch] Failed to refresh {symbol}: {e}")
         return results
 
     async def refresh_user_watchlist(
         self, watchlist_items: List[dict], db: AsyncSession
     ) -> dict:
-        success_count = 0
-        fail_count = 0
-        updated_symbols = []
+        items = [
+            (item.get("symbol"), item.get("market") or self._detect_market(item.get("symbol")))
+            for item in watchlist_items
+        ]
+        refreshed, failed = await self._refresh_quotes(items, db)
+        for symbol, e in failed:
+            logger.error(f"[Watchlist] Failed to refresh {symbol}: {e}")
 
-        for item in watchlist_items:
-            symbol = item.get("symbol")
-            market = item.get("market") or self._detect_market(symbol)
-            try:
-                quote = await self.get_quote(symbol, market, db, force_refresh=True)
-                success_count += 1
-                updated_symbols.append(symbol)
-            except Exception as e:
-                fail_count += 1
-                logger.error(f"[Watchlist] Failed to refresh {symbol}: {e}")
+        failed_symbols = {symbol for symbol, _ in failed}
+        updated_symbols = [symbol for symbol, _ in items if symbol not in failed_symbols]
 
         return {
-            "success": success_count,
-            "failed": fail_count,
+            "success": len(updated_symbols),
+            "failed": len(failed),
             "updated_symbols": updated_symbols,
         }
 
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Optional, List
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import partial
 
@@ -9,24 +11,66 @@ from app.schemas.market import StockQuote, KlinePoint, FundamentalData
 from app.services.market_data.base import MarketDataProvider
 
 
+# Full-market spot snapshot is ~5000 rows; reuse it across symbols for a few seconds
+SPOT_SNAPSHOT_TTL = 5.0
+
+# AKShare calls are slow blocking HTTP scrapes; give them their own pool so they
+# cannot starve the default executor used by other blocking I/O
+_AKSHARE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="akshare")
+
+
+async def run_akshare(fn, /, *args, **kwargs):
+    """``asyncio.to_thread`` equivalent that runs on the dedicated AKShare pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_AKSHARE_EXECUTOR, partial(fn, *args, **kwargs))
+
+
 class AKShareProvider(MarketDataProvider):
     """A-share market data via AKShare (free, open-source)."""
 
-    async def get_quote(self, symbol: str) -> StockQuote:
-        import akshare as ak
+    def __init__(self):
+        self._spot_cache = None  # (monotonic timestamp, DataFrame)
+        self._spot_lock = asyncio.Lock()
 
+    async def _get_spot_snapshot(self):
+        """Return the cached spot DataFrame, refetching at most once per TTL (single-flight)."""
+        cached = self._spot_cache
+        if cached and time.monotonic() - cached[0] < SPOT_SNAPSHOT_TTL:
+            return cached[1]
+
+        async with self._spot_lock:
+            cached = self._spot_cache
+            if cached and time.monotonic() - cached[0] < SPOT_SNAPSHOT_TTL:
+                return cached[1]
+
+            import akshare as ak
+
+            data = await run_akshare(ak.stock_zh_a_spot_em)
+            self._spot_cache = (time.monotonic(), data)
+            return data
+
+    async def get_quote(self, symbol: str) -> StockQuote:
         # Strip exchange suffix for AKShare (e.g., 600519.SH -> 600519)
         code = symbol.split(".")[0]
 
-        data = await asyncio.get_event_loop().run_in_executor(
-            None, partial(ak.stock_zh_a_spot_em)
-        )
+        data = await self._get_spot_snapshot()
 
-        row = data[data["代码"] == code]
+        row = data.loc[data["代码"] == code]
         if row.empty:
             raise ValueError(f"A-share symbol not found: {symbol}")
 
-        row = row.iloc[0]
+        return self._row_to_quote(symbol, row.iloc[0])
+
+    async def get_quotes_batch(self, symbols: List[str]) -> List[StockQuote]:
+        """Quotes for many A-share symbols from a single spot snapshot; unknown symbols are skipped."""
+        data = await self._get_spot_snapshot()
+
+        by_code = {symbol.split(".")[0]: symbol for symbol in symbols}
+        rows = data.loc[data["代码"].isin(by_code.keys())]
+        return [self._row_to_quote(by_code[row["代码"]], row) for _, row in rows.iterrows()]
+
+    @staticmethod
+    def _row_to_quote(symbol: str, row) -> StockQuote:
         return StockQuote(
             symbol=symbol,
             name=str(row.get("名称", "")),
@@ -61,42 +105,35 @@ class AKShareProvider(MarketDataProvider):
         ak_period = period_map.get(interval, "daily")
 
         if ak_period in ("daily", "weekly", "monthly"):
-            data = await asyncio.get_event_loop().run_in_executor(
-                None,
-                partial(ak.stock_zh_a_hist, symbol=code, period=ak_period, adjust="qfq"),
-            )
+            data = await run_akshare(ak.stock_zh_a_hist, symbol=code, period=ak_period, adjust="qfq")
         else:
-            data = await asyncio.get_event_loop().run_in_executor(
-                None,
-                partial(ak.stock_zh_a_hist_min_em, symbol=code, period=ak_period),
-            )
+            data = await run_akshare(ak.stock_zh_a_hist_min_em, symbol=code, period=ak_period)
 
         if data is None or data.empty:
             return []
 
         data = data.tail(outputsize)
 
-        result = []
-        for _, row in data.iterrows():
-            dt = row.get("日期", row.get("时间", ""))
-            result.append(
-                KlinePoint(
-                    datetime=str(dt),
-                    open=float(row.get("开盘", 0)),
-                    high=float(row.get("最高", 0)),
-                    low=float(row.get("最低", 0)),
-                    close=float(row.get("收盘", 0)),
-                    volume=int(row.get("成交量", 0)) if row.get("成交量") is not None else None,
-                )
-            )
-        return result
+        # Columnar conversion: one to_numpy()/tolist() per column instead of boxing each row as a Series
+        dt_col = "日期" if "日期" in data.columns else "时间"
+        datetimes = [str(dt) for dt in data[dt_col].tolist()]
+        opens = data["开盘"].to_numpy(dtype=float).tolist()
+        highs = data["最高"].to_numpy(dtype=float).tolist()
+        lows = data["最低"].to_numpy(dtype=float).tolist()
+        closes = data["收盘"].to_numpy(dtype=float).tolist()
+        volumes = (
+            data["成交量"].to_numpy(dtype="int64").tolist()
+            if "成交量" in data.columns
+            else [None] * len(data)
+        )
 
-    async def search(self, query: str) -> List[dict]:
-        import akshare as ak
+        return [
+            KlinePoint(datetime=dt, open=o, high=h, low=l, close=c, volume=v)
+            for dt, o, h, l, c, v in zip(datetimes, opens, highs, lows, closes, volumes)
+        ]
 
-        data = await asyncio.get_event_loop().run_in_executor(
-            None, partial(ak.stock_zh_a_spot_em)
-        )
+    async def search(self, query: str) -> List[dict]:
+        data = await self._get_spot_snapshot()
 
         matches = data[
             data["代码"].str.contains(query, na=False)
@@ -120,9 +157,7 @@ class AKShareProvider(MarketDataProvider):
         code = symbol.split(".")[0]
 
         try:
-            data = await asyncio.get_event_loop().run_in_executor(
-                None, partial(ak.stock_individual_info_em, symbol=code)
-            )
+            data = await run_akshare(ak.stock_individual_info_em, symbol=code)
             if data is None or data.empty:
                 return None
 
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from typing import Optional, List
 from abc import ABC, abstractmethod
 from app.schemas.market import StockQuote, KlinePoint, FundamentalData
 
+logger = logging.getLogger(__name__)
+
 
 class MarketDataProvider(ABC):
     @abstractmethod
@@ -22,3 +26,23 @@ class MarketDataProvider(ABC):
 
     async def get_fundamentals(self, symbol: str) -> Optional[FundamentalData]:
         return None
+
+    async def get_market_context(
+        self, symbol: str, outputsize: int = 100
+    ) -> tuple[Optional[StockQuote], Optional[List[KlinePoint]]]:
+        """Latest quote plus daily klines; providers that can serve both from one call override this.
+
+        A half that fails comes back as None so callers can still work with the other one.
+        """
+        quote, kline = await asyncio.gather(
+            self.get_quote(symbol),
+            self.get_kline(symbol, "1day", outputsize),
+            return_exceptions=True,
+        )
+        if isinstance(quote, Exception):
+            logger.warning(f"[MarketData] Failed to get quote for {symbol}: {quote}")
+            quote = None
+        if isinstance(kline, Exception):
+            logger.warning(f"[MarketData] Failed to get kline for {symbol}: {kline}")
+            kline = None
+        return quote, kline
@@ -1,11 +1,24 @@
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from decimal import Decimal
 from datetime import datetime, timezone
 import httpx
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from app.config import settings
+from app.services.market_data.cache import CacheService
 
 logger = logging.getLogger(__name__)
 
+# BTC 价格对所有用户相同，放在 Redis 里共享，短 TTL + stale-while-revalidate
+BTC_PRICE_CACHE_KEY = "btc:price:usd"
+BTC_PRICE_TTL_SECONDS = 10
+BTC_PRICE_STALE_SECONDS = 50
+
+# 1 BTC = 1e8 satoshi；RPC 返回整数 satoshi，直接按整数构造 Decimal 再换算
+_SAT = Decimal(100_000_000)
+
 
 class BitcoinWalletProvider:
     """Bitcoin wallet integration provider."""
@@ -55,24 +68,84 @@ class BitcoinWalletProvider:
             logger.error(f"[Bitcoin] RPC call {method} failed: {str(e)}")
             raise
 
+    async def _call_rpc_batch(self, calls: List[Tuple[str, Optional[list]]]) -> List[Dict[str, Any]]:
+        """Send several RPC calls as one JSON-RPC 2.0 batch; returns raw responses in request order."""
+        client = await self._get_client()
+
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": str(i),
+                "method": method,
+                "params": params or [],
+            }
+            for i, (method, params) in enumerate(calls)
+        ]
+
+        try:
+            resp = await client.post(
+                self.rpc_url,
+                json=payload,
+                auth=self.auth,
+                headers={"Content-Type": "application/json"},
+            )
+            resp.raise_for_status()
+            responses = resp.json()
+
+        except Exception as e:
+            logger.error(f"[Bitcoin] RPC batch of {len(calls)} calls failed: {str(e)}")
+            raise
+
+        # 批量响应顺序不保证与请求一致，按 id 还原
+        by_id = {r.get("id"): r for r in responses}
+        return [by_id.get(str(i), {}) for i in range(len(calls))]
+
+    @staticmethod
+    def _parse_balance(result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "confirmed": Decimal(int(result.get("confirmed", 0))) / _SAT,
+            "unconfirmed": Decimal(int(result.get("unconfirmed", 0))) / _SAT,
+            "total": Decimal(int(result.get("balance", 0))) / _SAT,
+        }
+
+    @staticmethod
+    def _empty_balance() -> Dict[str, Any]:
+        return {
+            "confirmed": Decimal("0"),
+            "unconfirmed": Decimal("0"),
+            "total": Decimal("0"),
+        }
+
     async def get_balance(self, address: str) -> Dict[str, Any]:
         """Get balance for an address."""
         try:
             result = await self._call_rpc("getaddressbalance", [{"address": address}])
-            
-            return {
-                "confirmed": Decimal(str(result.get("confirmed", 0))) / 100000000,
-                "unconfirmed": Decimal(str(result.get("unconfirmed", 0))) / 100000000,
-                "total": Decimal(str(result.get("balance", 0))) / 100000000,
-            }
+            return self._parse_balance(result)
 
         except Exception as e:
             logger.error(f"[Bitcoin] 获取余额失败: {address} - {str(e)}")
-            return {
-                "confirmed": Decimal("0"),
-                "unconfirmed": Decimal("0"),
-                "total": Decimal("0"),
-            }
+            return self._empty_balance()
+
+    async def get_balances(self, addresses: List[str]) -> List[Dict[str, Any]]:
+        """Get balances for many addresses in a single batched RPC round trip."""
+        if not addresses:
+            return []
+
+        try:
+            responses = await self._call_rpc_batch(
+                [("getaddressbalance", [{"address": address}]) for address in addresses]
+            )
+        except Exception:
+            return [self._empty_balance() for _ in addresses]
+
+        balances = []
+        for address, response in zip(addresses, responses):
+            if response.get("error") or "result" not in response:
+                logger.error(f"[Bitcoin] 获取余额失败: {address} - {response.get('error')}")
+                balances.append(self._empty_balance())
+            else:
+                balances.append(self._parse_balance(response["result"] or {}))
+        return balances
 
     async def get_wallet_info(self) -> Dict[str, Any]:
         """Get wallet information."""
@@ -137,19 +210,53 @@ class BitcoinWalletProvider:
 class BitcoinPriceProvider:
     """Get Bitcoin price from exchanges."""
 
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._redis: Optional[aioredis.Redis] = None
+        self._cache = CacheService(self._get_redis)
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30.0)
+        return self._client
+
+    async def _get_redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+        return self._redis
+
+    async def close(self):
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    async def _fetch_btc_usd_price(self) -> Decimal:
+        client = await self._get_client()
+
+        resp = await client.get("https://api.coingecko.com/api/v3/simple/price", params={
+            "ids": "bitcoin",
+            "vs_currencies": "usd",
+        })
+        resp.raise_for_status()
+        data = resp.json()
+
+        return Decimal(str(data.get("bitcoin", {}).get("usd", 0)))
+
     async def get_btc_usd_price(self) -> Decimal:
         """Get current BTC/USD price."""
         try:
-            client = httpx.AsyncClient(timeout=30.0)
-            
-            resp = await client.get("https://api.coingecko.com/api/v3/simple/price", params={
-                "ids": "bitcoin",
-                "vs_currencies": "usd",
-            })
-            resp.raise_for_status()
-            data = resp.json()
-            
-            return Decimal(str(data.get("bitcoin", {}).get("usd", 0)))
+            try:
+                return await self._cache.get_or_set_swr(
+                    BTC_PRICE_CACHE_KEY,
+                    self._fetch_btc_usd_price,
+                    ttl=BTC_PRICE_TTL_SECONDS,
+                    stale_ttl=BTC_PRICE_STALE_SECONDS,
+                    dumps=str,
+                    loads=Decimal,
+                )
+            except RedisError as e:
+                logger.warning(f"[Bitcoin] 价格缓存不可用，直接请求: {str(e)}")
+                return await self._fetch_btc_usd_price()
 
         except Exception as e:
             logger.error(f"[Bitcoin] 获取价格失败: {str(e)}")
@@ -173,14 +280,32 @@ class BitcoinWalletService:
         address: str,
     ) -> Dict[str, Any]:
         """Sync wallet balance from blockchain."""
-        balance = await self.provider.get_balance(address)
-        price = await self.price_provider.get_btc_usd_price()
-        balance_usd = balance["total"] * price
+        balance, price = await asyncio.gather(
+            self.provider.get_balance(address),
+            self.price_provider.get_btc_usd_price(),
+        )
+        return self._balance_snapshot(address, balance, price)
 
+    async def sync_wallet_balances(
+        self,
+        addresses: List[str],
+    ) -> List[Dict[str, Any]]:
+        """Sync many wallet balances with one batched RPC call and a single BTC price lookup."""
+        price, balances = await asyncio.gather(
+            self.price_provider.get_btc_usd_price(),
+            self.provider.get_balances(addresses),
+        )
+        return [
+            self._balance_snapshot(address, balance, price)
+            for address, balance in zip(addresses, balances)
+        ]
+
+    @staticmethod
+    def _balance_snapshot(address: str, balance: Dict[str, Any], price: Decimal) -> Dict[str, Any]:
         return {
             "address": address,
             "balance_btc": balance["total"],
-            "balance_usd": balance_usd,
+            "balance_usd": balance["total"] * price,
             "btc_price_usd": price,
             "last_sync": datetime.now(timezone.utc),
         }
@@ -222,6 +347,7 @@ class BitcoinWalletService:
 
     async def close(self):
         await self.provider.close()
+        await self.price_provider.close()
 
 
 bitcoin_wallet_service = None
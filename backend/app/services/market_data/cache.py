@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Set, Dict
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+
+class CacheService:
+    """Redis 缓存：stale-while-revalidate + 按 key 单飞刷新
+
+    每个值写两个 key：``{key}`` 保存序列化后的数据，``{key}:fresh_until`` 保存新鲜截止时间戳。
+    两者都在 ttl + stale_ttl 后过期；新鲜期内直接返回，过期但仍在 stale 窗口内时
+    立即返回旧值并在后台刷新，完全未命中时才同步调用 factory。
+    """
+
+    def __init__(self, get_redis: Callable[[], Awaitable[aioredis.Redis]]):
+        self._get_redis = get_redis
+        # 单飞锁按引用计数持有：最后一个使用者退出时删除，避免按查询/K线参数生成的 key 无限累积
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def set_many(self, entries: List[tuple[str, str | bytes, int]], stale_ttl: int = 0) -> None:
+        """一次 pipeline 往返写入多条 (key, value, ttl)"""
+        redis = await self._get_redis()
+        now = time.time()
+        async with redis.pipeline(transaction=False) as pipe:
+            for key, value, ttl in entries:
+                pipe.set(key, value, ex=ttl + stale_ttl)
+                pipe.set(f"{key}:fresh_until", now + ttl, ex=ttl + stale_ttl)
+            await pipe.execute()
+
+    async def get_or_set_swr(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int,
+        dumps: Callable[[Any], str | bytes],
+        loads: Callable[[str | bytes], Any],
+    ) -> Any:
+        redis = await self._get_redis()
+        raw, fresh_until = await redis.mget(key, f"{key}:fresh_until")
+        if raw is not None:
+            if fresh_until is None or time.time() >= float(fresh_until):
+                self._schedule_refresh(key, factory, ttl, stale_ttl, dumps)
+            return loads(raw)
+        return await self._refresh(key, factory, ttl, stale_ttl, dumps, loads)
+
+    async def _refresh(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int,
+        dumps: Callable[[Any], str | bytes],
+        loads: Optional[Callable[[str | bytes], Any]] = None,
+    ) -> Any:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._lock_users[key] = self._lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                # 等锁期间可能已被其他协程刷新
+                if loads is not None:
+                    redis = await self._get_redis()
+                    raw = await redis.get(key)
+                    if raw is not None:
+                        return loads(raw)
+                value = await factory()
+                if value is not None:
+                    await self.set_many([(key, dumps(value), ttl)], stale_ttl)
+                return value
+        finally:
+            users = self._lock_users[key] - 1
+            if users:
+                self._lock_users[key] = users
+            else:
+                del self._lock_users[key]
+                del self._locks[key]
+
+    def _schedule_refresh(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: int,
+        stale_ttl: int,
+        dumps: Callable[[Any], str | bytes],
+    ) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def _run():
+            try:
+                await self._refresh(key, factory, ttl, stale_ttl, dumps)
+                logger.info(f"[Cache] Background refreshed: {key}")
+            except Exception as e:
+                logger.warning(f"[Cache] Background refresh failed for {key}: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(_run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
@@ -1,17 +1,33 @@
 import logging
 import asyncio
+import heapq
+from operator import attrgetter
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 from decimal import Decimal
 from dataclasses import dataclass
 
+import numpy as np
+
 from app.services.market_data.polymarket import polymarket_provider
 from app.models.clawdbot import ClawdBotOpportunity
 
 logger = logging.getLogger(__name__)
 
+MARKET_ANALYSIS_CONCURRENCY = 32
+# 向量化预筛选阈值的容差：预筛选只需保证不漏掉候选，边界情况交给 analyze_market 精确判断
+_PREFILTER_EPS = 1e-9
+_BY_CONFIDENCE = attrgetter("confidence")
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return float("nan")
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TradingSignal:
     market_id: str
     market_slug: str
@@ -19,27 +35,54 @@ class TradingSignal:
     opportunity_type: str  # arbitrage, momentum, mean_reversion
     confidence: float
     signal_strength: float
-    
-    yes_price: Decimal
-    no_price: Decimal
-    target_price: Decimal
-    stop_loss: Decimal
-    
-    expected_return: Decimal
-    risk_score: Decimal
-    
+
+    # 阈值都很粗（5%、0.6、0.8），用 float 即可；只在写库时转换为 Decimal
+    yes_price: float
+    no_price: float
+    target_price: float
+    stop_loss: float
+
+    expected_return: float
+    risk_score: float
+
     analysis: Dict[str, Any]
 
+    def to_opportunity(self) -> ClawdBotOpportunity:
+        """转换为 ClawdBotOpportunity ORM 对象（Numeric 列在此统一转换为 Decimal）"""
+        def dec(x: float) -> Decimal:
+            return Decimal(str(round(x, 6)))
+
+        return ClawdBotOpportunity(
+            market_id=self.market_id,
+            market_slug=self.market_slug,
+            market_question=self.market_question,
+            opportunity_type=self.opportunity_type,
+            signal_strength=dec(self.signal_strength),
+            confidence=dec(self.confidence),
+            entry_price_yes=dec(self.yes_price),
+            entry_price_no=dec(self.no_price),
+            target_price=dec(self.target_price),
+            stop_loss=dec(self.stop_loss),
+            expected_return=dec(self.expected_return),
+            risk_score=dec(self.risk_score),
+            analysis=self.analysis,
+        )
+
 
 class ClawdBotAnalyzer:
     """Analyzes Polymarket markets to find trading opportunities."""
 
     def __init__(self):
-        self.min_confidence = Decimal("0.6")
-        self.min_volume_usd = Decimal("1000")
+        self.min_confidence = 0.6
+        self.min_volume_usd = 1000.0
+        # 并发分析市场时的上限，避免后续按市场拉取订单簿时压垮 Polymarket API
+        self._semaphore = asyncio.Semaphore(MARKET_ANALYSIS_CONCURRENCY)
+
+    async def analyze_all_markets(self, top_k: Optional[int] = None) -> List[TradingSignal]:
+        """Scan all markets and identify trading opportunities.
 
-    async def analyze_all_markets(self) -> List[TradingSignal]:
-        """Scan all markets and identify trading opportunities."""
+        Signals are returned by descending confidence; pass ``top_k`` to keep only the best ones.
+        """
         logger.info("[ClawdBot] 开始扫描市场寻找交易机会...")
 
         signals = []
@@ -47,16 +90,16 @@ class ClawdBotAnalyzer:
             markets = await polymarket_provider.fetch_all_markets()
             logger.info(f"[ClawdBot] 获取到 {len(markets)} 个市场")
 
-            for market in markets:
-                try:
-                    signal = await self.analyze_market(market)
-                    if signal:
-                        signals.append(signal)
-                except Exception as e:
-                    logger.warning(f"[ClawdBot] 分析市场失败: {market.get('id')} - {str(e)}")
-                    continue
+            candidates = self._prefilter(markets)
+            logger.info(f"[ClawdBot] 预筛选后剩余 {len(candidates)} 个候选市场")
 
-            signals.sort(key=lambda x: x.confidence, reverse=True)
+            results = await asyncio.gather(*(self._safe_analyze(m) for m in candidates))
+            signals = [signal for signal in results if signal]
+
+            if top_k is not None:
+                signals = heapq.nlargest(top_k, signals, key=_BY_CONFIDENCE)
+            else:
+                signals.sort(key=_BY_CONFIDENCE, reverse=True)
             logger.info(f"[ClawdBot] 发现 {len(signals)} 个潜在机会")
 
         except Exception as e:
@@ -64,6 +107,40 @@ class ClawdBotAnalyzer:
 
         return signals
 
+    def _prefilter(self, markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """用 NumPy 对全部市场一次性计算三类信号的触发条件，只保留可能产生信号的市场
+
+        条件与 _score_market 一致（阈值放宽 _PREFILTER_EPS），最终信号仍由 analyze_market 精确计算。
+        """
+        n = len(markets)
+        if n == 0:
+            return []
+        yes = np.fromiter((_to_float(m.get("yes_price")) for m in markets), dtype=np.float64, count=n)
+        no = np.fromiter((_to_float(m.get("no_price")) for m in markets), dtype=np.float64, count=n)
+        vol = np.fromiter((_to_float(m.get("volume")) for m in markets), dtype=np.float64, count=n)
+        eps = _PREFILTER_EPS
+
+        price_sum = yes + no
+        arb_mask = (price_sum != 0) & (np.abs(price_sum - 1.0) > 0.05 - eps) & (vol > 10000 - eps)
+
+        both_quoted = (yes != 0) & (no != 0)
+        leader = np.maximum(yes, no)
+        mom_mask = both_quoted & (leader >= 0.6 - eps) & (leader <= 0.95 + eps)
+
+        rev_conf = np.where(yes > 0.8 - eps, 1.0 - yes, 1.0 - no)
+        rev_mask = both_quoted & ((yes > 0.8 - eps) | (no > 0.8 - eps)) & (rev_conf >= 0.1 - eps)
+
+        mask = (vol >= self.min_volume_usd - eps) & (arb_mask | mom_mask | rev_mask)
+        return [markets[i] for i in np.flatnonzero(mask)]
+
+    async def _safe_analyze(self, market: Dict[str, Any]) -> Optional[TradingSignal]:
+        async with self._semaphore:
+            try:
+                return await self.analyze_market(market)
+            except Exception as e:
+                logger.warning(f"[ClawdBot] 分析市场失败: {market.get('id')} - {str(e)}")
+                return None
+
     async def analyze_market(self, market: Dict[str, Any]) -> Optional[TradingSignal]:
         """Analyze a single market for trading opportunities."""
         market_id = market.get("id") or market.get("market_id")
@@ -73,180 +150,104 @@ class ClawdBotAnalyzer:
         question = market.get("question", "")
         slug = market.get("slug", "")
         
-        yes_price = Decimal(str(market.get("yes_price", 0) or 0))
-        no_price = Decimal(str(market.get("no_price", 0) or 0))
-        volume = Decimal(str(market.get("volume", 0) or 0))
+        yes_price = float(market.get("yes_price", 0) or 0)
+        no_price = float(market.get("no_price", 0) or 0)
+        volume = float(market.get("volume", 0) or 0)
 
         if volume < self.min_volume_usd:
             return None
 
-        signals = []
-
-        arbitrage_signal = self._detect_arbitrage(yes_price, no_price, volume)
-        if arbitrage_signal:
-            signals.append(arbitrage_signal)
-
-        momentum_signal = self._detect_momentum(yes_price, no_price, volume, market)
-        if momentum_signal:
-            signals.append(momentum_signal)
-
-        reversion_signal = self._detect_mean_reversion(yes_price, no_price)
-        if reversion_signal:
-            signals.append(reversion_signal)
-
-        if not signals:
+        scored = self._score_market(yes_price, no_price, volume)
+        if scored is None:
             return None
 
-        best_signal = max(signals, key=lambda x: x.confidence * x.signal_strength)
+        opportunity_type, confidence, strength, target, stop, expected_return, risk, analysis = scored
         return TradingSignal(
             market_id=market_id,
             market_slug=slug,
             market_question=question,
-            opportunity_type=best_signal.opportunity_type,
-            confidence=best_signal.confidence,
-            signal_strength=best_signal.signal_strength,
+            opportunity_type=opportunity_type,
+            confidence=confidence,
+            signal_strength=strength,
             yes_price=yes_price,
             no_price=no_price,
-            target_price=best_signal.target_price,
-            stop_loss=best_signal.stop_loss,
-            expected_return=best_signal.expected_return,
-            risk_score=best_signal.risk_score,
-            analysis=best_signal.analysis,
+            target_price=target,
+            stop_loss=stop,
+            expected_return=expected_return,
+            risk_score=risk,
+            analysis=analysis,
         )
 
-    def _detect_arbitrage(
-        self,
-        yes_price: Decimal,
-        no_price: Decimal,
-        volume: Decimal,
-    ) -> Optional[TradingSignal]:
-        """Detect potential arbitrage opportunities."""
+    @staticmethod
+    def _score_market(yes_price: float, no_price: float, volume: float) -> Optional[tuple]:
+        """Score arbitrage / momentum / mean reversion in one pass and return the winner.
+
+        Candidates are compared by confidence * strength (ties go to the earlier type, in the
+        order above); only the winning signal's fields and analysis are built. Returns
+        ``(type, confidence, strength, target, stop, expected_return, risk, analysis)`` or None.
+        """
+        best_score = None
+        best_type = None
+
+        # Arbitrage: yes + no deviates from $1 on a liquid market
         price_sum = yes_price + no_price
-        if price_sum == 0:
+        deviation = abs(price_sum - 1)
+        if price_sum != 0 and deviation > 0.05 and volume > 10000:
+            arb_confidence = min(deviation * 10, 0.95)
+            arb_strength = deviation * 5
+            best_score, best_type = arb_confidence * arb_strength, "arbitrage"
+
+        if yes_price != 0 and no_price != 0:
+            # Momentum: the leading side is confident but not yet saturated
+            mom_confidence = yes_price if yes_price > no_price else no_price
+            if 0.6 <= mom_confidence <= 0.95:
+                score = mom_confidence * mom_confidence
+                if best_score is None or score > best_score:
+                    best_score, best_type = score, "momentum"
+
+            # Mean reversion: one side above 80% may revert towards 50%
+            if yes_price > 0.8 or no_price > 0.8:
+                rev_base = 1 - (yes_price if yes_price > 0.8 else no_price)
+                if rev_base >= 0.1:
+                    score = (rev_base * 0.8) * (rev_base * 0.5)
+                    if best_score is None or score > best_score:
+                        best_score, best_type = score, "mean_reversion"
+
+        if best_type is None:
             return None
 
-        deviation = abs(price_sum - Decimal("1"))
-        threshold = Decimal("0.05")
-
-        if deviation > threshold and volume > Decimal("10000"):
-            expected_return = deviation * Decimal("100")
-            
-            if yes_price > no_price:
-                target = Decimal("0.5")
-                side = "no"
-            else:
-                target = Decimal("0.5")
-                side = "yes"
-
-            return TradingSignal(
-                market_id="",
-                market_slug="",
-                market_question="",
-                opportunity_type="arbitrage",
-                confidence=min(float(deviation * 10), 0.95),
-                signal_strength=float(deviation * 5),
-                yes_price=yes_price,
-                no_price=no_price,
-                target_price=target,
-                stop_loss=target - Decimal("0.1"),
-                expected_return=expected_return,
-                risk_score=Decimal("0.3"),
-                analysis={
+        if best_type == "arbitrage":
+            target = 0.5
+            return (
+                "arbitrage", arb_confidence, arb_strength, target, target - 0.1, deviation * 100, 0.3,
+                {
                     "type": "arbitrage",
                     "reason": f"价格偏离1美元约{deviation*100:.1f}%",
-                    "volume_usd": float(volume),
-                    "side": side,
+                    "volume_usd": volume,
+                    "side": "no" if yes_price > no_price else "yes",
                 },
             )
 
-        return None
-
-    def _detect_momentum(
-        self,
-        yes_price: Decimal,
-        no_price: Decimal,
-        volume: Decimal,
-        market: Dict[str, Any],
-    ) -> Optional[TradingSignal]:
-        """Detect momentum-based opportunities."""
-        if yes_price == 0 or no_price == 0:
-            return None
-
-        if yes_price > no_price:
-            confidence = float(yes_price)
-            side = "yes"
-            target = min(yes_price * Decimal("1.2"), Decimal("0.95"))
-            stop = yes_price * Decimal("0.85")
-        else:
-            confidence = float(no_price)
-            side = "no"
-            target = min(no_price * Decimal("1.2"), Decimal("0.95"))
-            stop = no_price * Decimal("0.85")
-
-        if confidence < 0.6 or confidence > 0.95:
-            return None
-
-        return TradingSignal(
-            market_id="",
-            market_slug="",
-            market_question="",
-            opportunity_type="momentum",
-            confidence=confidence,
-            signal_strength=confidence,
-            yes_price=yes_price,
-            no_price=no_price,
-            target_price=target,
-            stop_loss=stop,
-            expected_return=Decimal("20"),
-            risk_score=Decimal("0.5"),
-            analysis={
-                "type": "momentum",
-                "reason": f"{side.upper()} 方向有 {confidence*100:.1f}% 置信度",
-                "volume_usd": float(volume),
-                "side": side,
-            },
-        )
-
-    def _detect_mean_reversion(
-        self,
-        yes_price: Decimal,
-        no_price: Decimal,
-    ) -> Optional[TradingSignal]:
-        """Detect mean reversion opportunities."""
-        if yes_price == 0 or no_price == 0:
-            return None
-
-        if yes_price > Decimal("0.8"):
-            target = Decimal("0.5")
-            confidence = float(Decimal("1") - yes_price)
-            side = "no"
-        elif no_price > Decimal("0.8"):
-            target = Decimal("0.5")
-            confidence = float(Decimal("1") - no_price)
-            side = "yes"
-        else:
-            return None
-
-        if confidence < 0.1:
-            return None
+        if best_type == "momentum":
+            side = "yes" if yes_price > no_price else "no"
+            return (
+                "momentum", mom_confidence, mom_confidence,
+                min(mom_confidence * 1.2, 0.95), mom_confidence * 0.85, 20.0, 0.5,
+                {
+                    "type": "momentum",
+                    "reason": f"{side.upper()} 方向有 {mom_confidence*100:.1f}% 置信度",
+                    "volume_usd": volume,
+                    "side": side,
+                },
+            )
 
-        return TradingSignal(
-            market_id="",
-            market_slug="",
-            market_question="",
-            opportunity_type="mean_reversion",
-            confidence=confidence * 0.8,
-            signal_strength=confidence * 0.5,
-            yes_price=yes_price,
-            no_price=no_price,
-            target_price=target,
-            stop_loss=target - Decimal("0.15"),
-            expected_return=confidence * Decimal("50"),
-            risk_score=Decimal("0.4"),
-            analysis={
+        target = 0.5
+        return (
+            "mean_reversion", rev_base * 0.8, rev_base * 0.5, target, target - 0.15, rev_base * 50, 0.4,
+            {
                 "type": "mean_reversion",
-                "reason": f"价格可能均值回归至50%",
-                "side": side,
+                "reason": "价格可能均值回归至50%",
+                "side": "no" if yes_price > 0.8 else "yes",
             },
         )
 
@@ -6,12 +6,24 @@
 from __future__ import annotations
 
 import logging
+import warnings
+from itertools import pairwise
 from typing import Optional, List
-from statistics import mean, stdev
+
+import numpy as np
+from cachetools import LRUCache
+
 from app.schemas.market import FundamentalData, KlinePoint, StockQuote
+from app.services.market_data import _estimator_kernel
+from app.services.market_data._estimator_kernel import RollingKlineStats
 
 logger = logging.getLogger(__name__)
 
+ESTIMATION_NOTE = "基于股票行情数据估算，仅供参考"
+
+# 每个 (symbol, market) 最近一次估算的滚动统计量，轮询同一标的时增量更新
+_ROLLING_STATS: LRUCache = LRUCache(maxsize=2048)
+
 
 class MarketDataEstimator:
     """
@@ -68,10 +80,84 @@ class MarketDataEstimator:
 
         # 标记为估算值
         estimated_data.is_estimated = True
-        estimated_data.estimation_note = "基于股票行情数据估算，仅供参考"
+        estimated_data.estimation_note = ESTIMATION_NOTE
 
         return estimated_data
 
+    @staticmethod
+    def estimate_many(
+        symbols: List[str],
+        markets: List[str],
+        quotes: List[Optional[StockQuote]],
+        klines_list: List[Optional[List[KlinePoint]]],
+    ) -> List[Optional[FundamentalData]]:
+        """
+        批量估算多个标的的基本面指标，结果与逐个调用 estimate_from_market_data 一致
+
+        各标的最近 60 根收盘价右对齐（不足补 NaN）堆叠为 (S, 60) 矩阵，
+        MA20 / MA60 / 波动率 / 60日收益 / 均量按行一次矩阵运算得到。
+        """
+        count = len(symbols)
+        window = RollingKlineStats.WINDOW
+        closes = np.full((count, window), np.nan)
+        volumes = np.full((count, 20), np.nan)
+        lengths = np.zeros(count, dtype=np.int64)
+
+        for i, klines in enumerate(klines_list):
+            if not klines:
+                continue
+            if not all(a.datetime <= b.datetime for a, b in pairwise(klines)):
+                klines = sorted(klines, key=lambda x: x.datetime)
+            tail = klines[-window:]
+            closes[i, window - len(tail):] = [k.close for k in tail]
+            # 成交量为 0 / 缺失的不计入均量，置为 NaN 后由 nanmean 跳过
+            volume_tail = klines[-20:]
+            volumes[i, 20 - len(volume_tail):] = [k.volume or np.nan for k in volume_tail]
+            lengths[i] = len(klines)
+
+        # 不足窗口的行含 NaN，其结果会被下面的长度条件丢弃；除零得到的 inf / NaN 视为估算失败
+        with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            latest = closes[:, -1]
+            ma20 = np.where(lengths >= 20, np.nanmean(closes[:, -20:], axis=1), latest)
+            ma60 = np.where(lengths >= 60, np.nanmean(closes, axis=1), latest)
+            recent = closes[:, -30:]
+            returns = np.diff(recent, axis=1) / recent[:, :-1]
+            volatility = np.where(
+                lengths >= 30, np.nanstd(returns, axis=1, ddof=1) * _estimator_kernel.ANNUALIZATION, 0.0
+            )
+            return_60d = np.where(lengths >= 60, (latest / closes[:, 0] - 1) * 100, 0.0)
+            avg_volume = np.where(lengths >= 20, np.nan_to_num(np.nanmean(volumes, axis=1)), 0.0)
+            stats = np.column_stack((latest, volatility, return_60d, ma20, ma60, avg_volume))
+        valid = (lengths >= 20) & np.isfinite(stats).all(axis=1)
+
+        # 行情补充：按 成交量 * 50 估算股本
+        quote_price = np.array([q.price if q else np.nan for q in quotes], dtype=np.float64)
+        quote_volume = np.array([(q.volume or 0) if q else 0 for q in quotes], dtype=np.float64)
+        quote_market_cap = np.where(quote_volume > 0, quote_price * (quote_volume * 50), np.nan)
+
+        results: List[Optional[FundamentalData]] = []
+        for i, symbol in enumerate(symbols):
+            if not quotes[i] and not klines_list[i]:
+                logger.warning(f"[Estimator] No market data available for {symbol}")
+                results.append(None)
+                continue
+
+            if valid[i]:
+                data = MarketDataEstimator._from_kline_stats(symbol, markets[i], *stats[i].tolist())
+            else:
+                if lengths[i] >= 20:
+                    logger.error(f"[Estimator] Failed to estimate from kline: {symbol}")
+                data = FundamentalData(symbol=symbol, market=markets[i])
+
+            if not data.market_cap and not np.isnan(quote_market_cap[i]):
+                data.market_cap = float(quote_market_cap[i])
+            data.is_estimated = True
+            data.estimation_note = ESTIMATION_NOTE
+            results.append(data)
+
+        return results
+
     @staticmethod
     def _estimate_from_kline(
         symbol: str,
@@ -81,38 +167,49 @@ class MarketDataEstimator:
     ) -> FundamentalData:
         """基于K线数据估算指标"""
 
-        # 按时间排序（确保从旧到新）
-        sorted_data = sorted(kline_data, key=lambda x: x.datetime)
-
-        # 获取最新价格
-        latest_close = sorted_data[-1].close
+        # 按时间排序（确保从旧到新）；数据源返回的通常已是升序，O(N) 检查通过时跳过排序
+        if not all(a.datetime <= b.datetime for a, b in pairwise(kline_data)):
+            kline_data = sorted(kline_data, key=lambda x: x.datetime)
 
-        # 计算波动率（年化）
-        if len(sorted_data) >= 30:
-            recent_closes = [k.close for k in sorted_data[-30:]]
-            returns = [(recent_closes[i] / recent_closes[i-1] - 1)
-                      for i in range(1, len(recent_closes))]
-            volatility = stdev(returns) * (252 ** 0.5) if len(returns) > 1 else 0
+        # 收盘价 / 成交量一次性转为数组，后续窗口切片都是视图不再复制；
+        # 统计量（波动率、60日收益、MA20/MA60、均量）由数值内核单遍计算
+        n = len(kline_data)
+        key = (symbol, market)
+        rolling = _ROLLING_STATS.get(key) if n >= RollingKlineStats.WINDOW else None
+        if rolling is not None and rolling.extend(kline_data):
+            # 同一标的的窗口只新增了几根K线：增量更新，无需重算整个窗口
+            latest_close = rolling.latest_close
+            volatility, return_60d, ma20, ma60, avg_volume = rolling.stats()
         else:
-            volatility = 0
-
-        # 计算趋势强度（收益率）
-        if len(sorted_data) >= 60:
-            price_60d_ago = sorted_data[-60].close
-            return_60d = (latest_close / price_60d_ago - 1) * 100
-        else:
-            return_60d = 0
+            closes = np.fromiter((k.close for k in kline_data), dtype=np.float64, count=n)
+            volumes = np.fromiter((k.volume or 0 for k in kline_data), dtype=np.float64, count=n)
+            latest_close = float(closes[-1])
+            volatility, return_60d, ma20, ma60, avg_volume = _estimator_kernel.kline_stats(closes, volumes)
+            if n >= RollingKlineStats.WINDOW:
+                _ROLLING_STATS[key] = RollingKlineStats(
+                    closes[-RollingKlineStats.WINDOW:].tolist(),
+                    volumes[-RollingKlineStats.WINDOW:].tolist(),
+                    [k.datetime for k in kline_data[-RollingKlineStats.WINDOW:]],
+                )
+            else:
+                _ROLLING_STATS.pop(key, None)
 
-        # 计算移动平均线
-        ma20 = mean([k.close for k in sorted_data[-20:]]) if len(sorted_data) >= 20 else latest_close
-        ma60 = mean([k.close for k in sorted_data[-60:]]) if len(sorted_data) >= 60 else latest_close
+        return MarketDataEstimator._from_kline_stats(
+            symbol, market, latest_close, volatility, return_60d, ma20, ma60, avg_volume
+        )
 
-        # 计算成交量趋势
-        if len(sorted_data) >= 20:
-            recent_volumes = [k.volume for k in sorted_data[-20:] if k.volume]
-            avg_volume = mean(recent_volumes) if recent_volumes else 0
-        else:
-            avg_volume = 0
+    @staticmethod
+    def _from_kline_stats(
+        symbol: str,
+        market: str,
+        latest_close: float,
+        volatility: float,
+        return_60d: float,
+        ma20: float,
+        ma60: float,
+        avg_volume: float,
+    ) -> FundamentalData:
+        """由K线统计量推导各项估算指标"""
 
         # 估算市值（使用最新价格和平均成交量）
         estimated_market_cap = None
@@ -1,22 +1,87 @@
+import asyncio
+import heapq
 import logging
+import re
+import time
 import httpx
+import orjson
 from typing import Optional, List, Dict, Any
-from datetime import datetime, timezone
-from decimal import Decimal
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
 POLYMARKET_API_BASE = "https://gamma-api.polymarket.com"
+# 同时在途的 Polymarket 请求上限（分页 / 批量详情并发拉取时共用，避免触发限流）
+POLYMARKET_MAX_CONCURRENCY = 8
+MARKETS_PAGE_SIZE = 100
+MARKETS_FETCH_TOTAL = 1000
+# 市场列表在扫描 / 热门 / 搜索之间共享的缓存时长（秒）
+MARKETS_CACHE_TTL = 30.0
+# 市场列表响应超过该大小（字节）且安装了 ijson 时改为流式解析
+MARKETS_STREAM_THRESHOLD = 4 * 1024 * 1024
+
+
+def _volume_key(market: Dict[str, Any]) -> float:
+    return float(market.get("volume", 0) or 0)
+
+
+class _AsyncByteReader:
+    """Adapts an async byte-chunk iterator to the ``async read(n)`` file interface ijson expects."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks.__aiter__()
+        self._buf = b""
+
+    async def _fill(self, n: int) -> None:
+        while n < 0 or len(self._buf) < n:
+            try:
+                self._buf += await self._chunks.__anext__()
+            except StopAsyncIteration:
+                break
+
+    async def peek_byte(self) -> bytes:
+        """First non-whitespace byte of the remaining stream, without consuming it."""
+        while not self._buf.lstrip():
+            before = len(self._buf)
+            await self._fill(before + 1)
+            if len(self._buf) == before:
+                return b""
+        return self._buf.lstrip()[:1]
+
+    async def read(self, n: int = -1) -> bytes:
+        await self._fill(n)
+        if n < 0:
+            data, self._buf = self._buf, b""
+        else:
+            data, self._buf = self._buf[:n], self._buf[n:]
+        return data
+
+
+async def _stream_markets(resp: httpx.Response) -> List[Dict[str, Any]]:
+    """Incrementally parse a market-list response (top-level array or ``{"markets": [...]}``)."""
+    reader = _AsyncByteReader(resp.aiter_bytes())
+    prefix = "item" if await reader.peek_byte() == b"[" else "markets.item"
+    return [m async for m in ijson.items_async(reader, prefix, use_float=True)]
 
 
 class PolymarketClient:
     def __init__(self):
         self.base_url = POLYMARKET_API_BASE
         self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(POLYMARKET_MAX_CONCURRENCY)
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None:
-            self._client = httpx.AsyncClient(timeout=30.0)
+            # HTTP/2 多路复用：并发分页 / 批量请求共用少量 TLS 连接
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=30),
+            )
         return self._client
 
     async def close(self):
@@ -44,11 +109,20 @@ class PolymarketClient:
 
         try:
             logger.debug(f"[Polymarket] 获取市场列表: {params}")
-            resp = await client.get(f"{self.base_url}/markets", params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            markets = data.get("markets", []) if isinstance(data, dict) else data
+            async with self._semaphore:
+                async with client.stream("GET", f"{self.base_url}/markets", params=params) as resp:
+                    if resp.is_error:
+                        await resp.aread()
+                    resp.raise_for_status()
+
+                    size = int(resp.headers.get("content-length") or 0)
+                    if ijson is not None and size > MARKETS_STREAM_THRESHOLD:
+                        # 超大响应边下载边解析，不在内存中同时保留完整原始字节
+                        markets = await _stream_markets(resp)
+                    else:
+                        data = orjson.loads(await resp.aread())
+                        markets = data.get("markets", []) if isinstance(data, dict) else data
+
             logger.info(f"[Polymarket] 获取到 {len(markets)} 个市场")
             return markets
 
@@ -65,13 +139,14 @@ class PolymarketClient:
 
         try:
             logger.debug(f"[Polymarket] 获取市场详情: {market_id}")
-            resp = await client.get(f"{self.base_url}/markets/{market_id}")
+            async with self._semaphore:
+                resp = await client.get(f"{self.base_url}/markets/{market_id}")
             
             if resp.status_code == 404:
                 return None
             resp.raise_for_status()
             
-            data = resp.json()
+            data = orjson.loads(resp.content)
             logger.info(f"[Polymarket] 获取市场详情成功: {market_id}")
             return data
 
@@ -86,7 +161,7 @@ class PolymarketClient:
         try:
             resp = await client.get(f"{self.base_url}/markets/{market_id}/order-book")
             resp.raise_for_status()
-            return resp.json()
+            return orjson.loads(resp.content)
 
         except Exception as e:
             logger.error(f"[Polymarket] 获取订单簿失败: {str(e)}")
@@ -103,7 +178,7 @@ class PolymarketClient:
 
             resp = await client.get(f"{self.base_url}/events", params=params)
             resp.raise_for_status()
-            return resp.json().get("events", [])
+            return orjson.loads(resp.content).get("events", [])
 
         except Exception as e:
             logger.error(f"[Polymarket] 获取事件失败: {str(e)}")
@@ -115,10 +190,67 @@ class PolymarketProvider:
 
     def __init__(self):
         self.client = PolymarketClient()
+        self._markets_cache: Dict[tuple, tuple[float, List[Dict[str, Any]]]] = {}
+        self._markets_lock = asyncio.Lock()
+        # 与市场列表同步重建的搜索索引：(源列表, [(market, 小写的 question + slug)])
+        self._search_index: tuple[Optional[list], List[tuple[Dict[str, Any], str]]] = (None, [])
+
+    async def fetch_all_markets(
+        self,
+        category: Optional[str] = None,
+        total: int = MARKETS_FETCH_TOTAL,
+        page_size: int = MARKETS_PAGE_SIZE,
+    ) -> List[Dict[str, Any]]:
+        """Fetch all active markets, reusing the list for MARKETS_CACHE_TTL seconds (single-flight)."""
+        key = (category, total, page_size)
+        cached = self._markets_cache.get(key)
+        if cached and time.monotonic() - cached[0] < MARKETS_CACHE_TTL:
+            return cached[1]
+
+        async with self._markets_lock:
+            cached = self._markets_cache.get(key)
+            if cached and time.monotonic() - cached[0] < MARKETS_CACHE_TTL:
+                return cached[1]
+
+            markets = await self._fetch_markets_paginated(category, total, page_size)
+            self._markets_cache[key] = (time.monotonic(), markets)
+            if category is None:
+                self._search_index = (markets, self._build_search_index(markets))
+            return markets
 
-    async def fetch_all_markets(self, category: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Fetch all active markets."""
-        return await self.client.get_markets(category=category, limit=100)
+    @staticmethod
+    def _build_search_index(markets: List[Dict[str, Any]]) -> List[tuple[Dict[str, Any], str]]:
+        # 换行分隔，避免查询词跨 question / slug 边界误匹配
+        return [
+            (m, f"{m.get('question') or ''}\n{m.get('slug') or ''}".lower())
+            for m in markets
+        ]
+
+    async def _fetch_markets_paginated(
+        self,
+        category: Optional[str],
+        total: int,
+        page_size: int,
+    ) -> List[Dict[str, Any]]:
+        """Request every offset page concurrently."""
+        offsets = range(0, total, page_size)
+        pages = await asyncio.gather(
+            *(self.client.get_markets(category=category, limit=page_size, offset=o) for o in offsets),
+            return_exceptions=True,
+        )
+
+        markets = []
+        errors = []
+        for offset, page in zip(offsets, pages):
+            if isinstance(page, BaseException):
+                errors.append(page)
+                logger.warning(f"[Polymarket] 分页获取失败: offset={offset} - {str(page)}")
+                continue
+            markets.extend(page)
+
+        if errors and len(errors) == len(pages):
+            raise errors[0]
+        return markets
 
     async def get_market_prices(self, market_id: str) -> Dict[str, Any]:
         """Get current yes/no prices for a market."""
@@ -127,41 +259,75 @@ class PolymarketProvider:
             if not market:
                 return {}
 
+            # float 即可满足价格精度，时间戳用 epoch 秒；需要 Decimal 的调用方在输出边界自行转换
             return {
-                "yes_price": Decimal(str(market.get("yes_price", 0))),
-                "no_price": Decimal(str(market.get("no_price", 0))),
-                "volume": Decimal(str(market.get("volume", 0))),
-                "liquidity": Decimal(str(market.get("liquidity", 0))),
-                "last_updated": datetime.now(timezone.utc),
+                "yes_price": float(market.get("yes_price", 0)),
+                "no_price": float(market.get("no_price", 0)),
+                "volume": float(market.get("volume", 0)),
+                "liquidity": float(market.get("liquidity", 0)),
+                "last_updated": time.time(),
             }
         except Exception as e:
             logger.error(f"[Polymarket] 获取价格失败: {market_id} - {str(e)}")
             return {}
 
+    async def get_market_prices_many(self, market_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get prices for many markets concurrently; markets without data are omitted."""
+        results = await asyncio.gather(
+            *(self.get_market_prices(mid) for mid in market_ids),
+            return_exceptions=True,
+        )
+        return {
+            mid: prices
+            for mid, prices in zip(market_ids, results)
+            if prices and not isinstance(prices, BaseException)
+        }
+
     async def get_trending_markets(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get trending markets by volume."""
         markets = await self.fetch_all_markets()
-        
-        sorted_markets = sorted(
-            markets,
-            key=lambda x: float(x.get("volume", 0) or 0),
-            reverse=True
-        )
-        
-        return sorted_markets[:limit]
+        return heapq.nlargest(limit, markets, key=_volume_key)
+
+    async def _get_search_index(self) -> List[tuple[Dict[str, Any], str]]:
+        markets = await self.fetch_all_markets()
+        source, index = self._search_index
+        if source is not markets:
+            index = self._build_search_index(markets)
+            self._search_index = (markets, index)
+        return index
 
     async def search_markets(self, query: str) -> List[Dict[str, Any]]:
         """Search markets by keyword."""
-        markets = await self.fetch_all_markets()
-        
+        index = await self._get_search_index()
         query_lower = query.lower()
-        filtered = [
-            m for m in markets
-            if query_lower in m.get("question", "").lower()
-            or query_lower in m.get("slug", "").lower()
-        ]
-        
-        return filtered
+        return [m for m, blob in index if query_lower in blob]
+
+    async def search_markets_multi(self, queries: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Search several keywords in one pass over the market list.
+
+        A single compiled alternation rejects markets matching none of the keywords;
+        only the matching ones are checked per keyword (so overlapping keywords such
+        as "bt" / "btc" both get their hits).
+        """
+        results: Dict[str, List[Dict[str, Any]]] = {q: [] for q in queries}
+        terms = {q: q.lower() for q in queries}
+        if not queries:
+            return results
+        if not all(terms.values()):
+            # 空关键词匹配所有市场，退化为逐个搜索
+            for q in queries:
+                results[q] = await self.search_markets(q)
+            return results
+
+        index = await self._get_search_index()
+        pattern = re.compile("|".join(map(re.escape, set(terms.values()))))
+        for m, blob in index:
+            if pattern.search(blob) is None:
+                continue
+            for q, term in terms.items():
+                if term in blob:
+                    results[q].append(m)
+        return results
 
     async def close(self):
         await self.client.close()
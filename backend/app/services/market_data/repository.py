@@ -3,20 +3,54 @@ from __future__ import annotations
 import json
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Dict, Tuple
 from uuid import UUID
-from sqlalchemy import select, func
+from sqlalchemy import delete, select, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.stock_data import StockQuote, StockKline, StockFundamental
 from app.schemas.market import StockQuote as StockQuoteSchema, KlinePoint
 
 logger = logging.getLogger(__name__)
 
+# 14 列 * 1000 行，远低于 PostgreSQL 单条语句 32767 个绑定参数的上限
+QUOTE_UPSERT_PAGE_SIZE = 1000
+QUOTE_STREAM_BATCH_SIZE = 500
+
+_KLINE_UPSERT_COLUMNS = ("open", "high", "low", "close", "volume", "updated_at")
+_QUOTE_UPSERT_COLUMNS = (
+    "price", "change", "change_percent", "volume", "high", "low", "open", "prev_close",
+    "timestamp", "updated_at",
+)
+_FUNDAMENTAL_COLUMNS = frozenset(
+    c.name for c in StockFundamental.__table__.columns
+) - {"symbol", "market", "created_at", "updated_at"}
+
 
 class StockDataRepository:
+    """行情数据读写；save_* / upsert_* / delete_* / prune_* 不提交事务，由调用方（请求会话或调度任务）统一提交"""
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @staticmethod
+    def _to_quote_schema(db_quote: StockQuote) -> StockQuoteSchema:
+        # 库中数据已由列类型约束，model_construct 跳过 pydantic 校验；仅用于从库中读出的行
+        return StockQuoteSchema.model_construct(
+            symbol=db_quote.symbol,
+            name=db_quote.name,
+            market=db_quote.market,
+            price=db_quote.price,
+            change=db_quote.change,
+            change_percent=db_quote.change_percent,
+            volume=db_quote.volume,
+            high=db_quote.high,
+            low=db_quote.low,
+            open=db_quote.open,
+            prev_close=db_quote.prev_close,
+            timestamp=db_quote.timestamp,
+        )
+
     async def get_quote(self, symbol: str, market: str) -> Optional[StockQuoteSchema]:
         stmt = select(StockQuote).where(
             StockQuote.symbol == symbol,
@@ -26,62 +60,53 @@ class StockDataRepository:
         db_quote = result.scalar_one_or_none()
 
         if db_quote:
-            return StockQuoteSchema(
-                symbol=db_quote.symbol,
-                name=db_quote.name,
-                market=db_quote.market,
-                price=db_quote.price,
-                change=db_quote.change,
-                change_percent=db_quote.change_percent,
-                volume=db_quote.volume,
-                high=db_quote.high,
-                low=db_quote.low,
-                open=db_quote.open,
-                prev_close=db_quote.prev_close,
-                timestamp=db_quote.timestamp,
-            )
+            return self._to_quote_schema(db_quote)
         return None
 
-    async def save_quote(self, quote: StockQuoteSchema) -> None:
+    async def get_quotes_bulk(
+        self, pairs: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], StockQuoteSchema]:
+        """一次 (symbol, market) IN (...) 查询取回多只股票的行情"""
+        if not pairs:
+            return {}
         stmt = select(StockQuote).where(
-            StockQuote.symbol == quote.symbol,
-            StockQuote.market == quote.market
+            tuple_(StockQuote.symbol, StockQuote.market).in_(pairs)
         )
         result = await self.db.execute(stmt)
-        db_quote = result.scalar_one_or_none()
+        return {
+            (q.symbol, q.market): self._to_quote_schema(q)
+            for q in result.scalars().all()
+        }
+
+    @staticmethod
+    def _upsert_quotes_stmt(rows: List[dict]):
+        """stock_quotes 的 INSERT ... ON CONFLICT (symbol, market) DO UPDATE；name 为空时保留原名称"""
+        stmt = pg_insert(StockQuote).values(rows)
+        set_ = {c: stmt.excluded[c] for c in _QUOTE_UPSERT_COLUMNS}
+        set_["name"] = func.coalesce(func.nullif(stmt.excluded.name, ""), StockQuote.name)
+        return stmt.on_conflict_do_update(index_elements=["symbol", "market"], set_=set_)
 
+    async def save_quote(self, quote: StockQuoteSchema) -> None:
+        vals = quote.model_dump()
+        vals["updated_at"] = datetime.now(timezone.utc)
+        await self.db.execute(self._upsert_quotes_stmt([vals]))
+
+    async def upsert_quotes_bulk(self, quotes: List[StockQuoteSchema]) -> int:
+        """批量写入多只股票行情，每 QUOTE_UPSERT_PAGE_SIZE 行一条多行 VALUES 语句"""
+        if not quotes:
+            return 0
         now = datetime.now(timezone.utc)
-        if db_quote:
-            if quote.name:
-                db_quote.name = quote.name
-            db_quote.price = quote.price
-            db_quote.change = quote.change
-            db_quote.change_percent = quote.change_percent
-            db_quote.volume = quote.volume
-            db_quote.high = quote.high
-            db_quote.low = quote.low
-            db_quote.open = quote.open
-            db_quote.prev_close = quote.prev_close
-            db_quote.timestamp = quote.timestamp
-            db_quote.updated_at = now
-        else:
-            db_quote = StockQuote(
-                symbol=quote.symbol,
-                market=quote.market,
-                name=quote.name,
-                price=quote.price,
-                change=quote.change,
-                change_percent=quote.change_percent,
-                volume=quote.volume,
-                high=quote.high,
-                low=quote.low,
-                open=quote.open,
-                prev_close=quote.prev_close,
-                timestamp=quote.timestamp,
-            )
-            self.db.add(db_quote)
-
-        await self.db.commit()
+        # 同一 (symbol, market) 只保留最后一条，否则 ON CONFLICT 会因同一行被更新两次而报错
+        rows = {}
+        for quote in quotes:
+            vals = quote.model_dump()
+            vals["updated_at"] = now
+            rows[(quote.symbol, quote.market)] = vals
+
+        rows = list(rows.values())
+        for i in range(0, len(rows), QUOTE_UPSERT_PAGE_SIZE):
+            await self.db.execute(self._upsert_quotes_stmt(rows[i:i + QUOTE_UPSERT_PAGE_SIZE]))
+        return len(rows)
 
     async def get_klines(
         self,
@@ -108,9 +133,10 @@ class StockDataRepository:
         result = await self.db.execute(query)
         db_klines = result.scalars().all()
 
+        # 同 _to_quote_schema：库中读出的行无需再校验
         return [
-            KlinePoint(
-                datetime=k.datetime.isoformat(),
+            KlinePoint.model_construct(
+                datetime=k.datetime,
                 open=k.open,
                 high=k.high,
                 low=k.low,
@@ -127,46 +153,34 @@ class StockDataRepository:
         interval: str,
         klines: List[KlinePoint],
     ) -> None:
+        if not klines:
+            return
+
         now = datetime.now(timezone.utc)
-        existing_keys = set()
-
-        if klines:
-            for kline in klines:
-                kline_dt = datetime.fromisoformat(kline.datetime.replace("Z", "+00:00"))
-                stmt = select(StockKline).where(
-                    StockKline.symbol == symbol,
-                    StockKline.market == market,
-                    StockKline.interval == interval,
-                    StockKline.datetime == kline_dt,
-                )
-                result = await self.db.execute(stmt)
-                existing = result.scalar_one_or_none()
-
-                key = f"{symbol}:{market}:{interval}:{kline_dt.isoformat()}"
-                existing_keys.add(key)
-
-                if existing:
-                    existing.open = kline.open
-                    existing.high = kline.high
-                    existing.low = kline.low
-                    existing.close = kline.close
-                    existing.volume = kline.volume
-                    existing.updated_at = now
-                else:
-                    db_kline = StockKline(
-                        symbol=symbol,
-                        market=market,
-                        interval=interval,
-                        datetime=kline_dt,
-                        open=kline.open,
-                        high=kline.high,
-                        low=kline.low,
-                        close=kline.close,
-                        volume=kline.volume,
-                    )
-                    self.db.add(db_kline)
-
-        await self.db.commit()
+        # 以 datetime 去重（同批次内重复的K线后者覆盖前者），否则 ON CONFLICT 会因同一行被更新两次而报错
+        rows = {}
+        for kline in klines:
+            kline_dt = kline.datetime
+            rows[kline_dt] = {
+                "symbol": symbol,
+                "market": market,
+                "interval": interval,
+                "datetime": kline_dt,
+                "open": kline.open,
+                "high": kline.high,
+                "low": kline.low,
+                "close": kline.close,
+                "volume": kline.volume,
+                "updated_at": now,
+            }
+
+        # 单条 INSERT ... ON CONFLICT DO UPDATE，依赖 uq_stock_kline_symbol_market_interval_datetime
+        stmt = pg_insert(StockKline).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["symbol", "market", "interval", "datetime"],
+            set_={c: stmt.excluded[c] for c in _KLINE_UPSERT_COLUMNS},
+        )
+        await self.db.execute(stmt)
 
     async def get_fundamentals(self, symbol: str, market: str) -> Optional[dict]:
         stmt = select(StockFundamental).where(
@@ -199,39 +213,32 @@ class StockDataRepository:
         return None
 
     async def save_fundamentals(self, symbol: str, market: str, data: dict) -> None:
-        stmt = select(StockFundamental).where(
-            StockFundamental.symbol == symbol,
-            StockFundamental.market == market,
+        # 只写入表中存在的列（FundamentalData 还带有估算标记、均线等非持久化字段）
+        data_copy = {k: v for k, v in data.items() if k in _FUNDAMENTAL_COLUMNS}
+        data_copy["updated_at"] = datetime.now(timezone.utc)
+
+        stmt = pg_insert(StockFundamental).values(symbol=symbol, market=market, **data_copy)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["symbol", "market"],
+            set_={k: stmt.excluded[k] for k in data_copy},
         )
-        result = await self.db.execute(stmt)
-        db_fund = result.scalar_one_or_none()
-
-        now = datetime.now(timezone.utc)
-        data_copy = data.copy()
-        data_copy.pop('symbol', None)
-        data_copy.pop('market', None)
-        
-        if db_fund:
-            for key, value in data_copy.items():
-                if hasattr(db_fund, key):
-                    setattr(db_fund, key, value)
-            db_fund.updated_at = now
-        else:
-            db_fund = StockFundamental(symbol=symbol, market=market, **data_copy)
-            self.db.add(db_fund)
-
-        await self.db.commit()
+        await self.db.execute(stmt)
 
     async def get_quotes_updated_before(
         self, market: str, before_minutes: int = 5
-    ) -> List[StockQuote]:
+    ) -> AsyncIterator[StockQuote]:
+        """流式返回更新时间早于阈值的行情（服务端游标，每次取 QUOTE_STREAM_BATCH_SIZE 行）"""
         threshold = datetime.now(timezone.utc) - timedelta(minutes=before_minutes)
-        stmt = select(StockQuote).where(
-            StockQuote.market == market,
-            StockQuote.updated_at < threshold,
+        stmt = (
+            select(StockQuote)
+            .where(
+                StockQuote.market == market,
+                StockQuote.updated_at < threshold,
+            )
+            .execution_options(yield_per=QUOTE_STREAM_BATCH_SIZE)
         )
-        result = await self.db.execute(stmt)
-        return list(result.scalars().all())
+        async for db_quote in await self.db.stream_scalars(stmt):
+            yield db_quote
 
     async def get_all_quotes(self, market: Optional[str] = None) -> List[StockQuote]:
         stmt = select(StockQuote)
@@ -240,6 +247,16 @@ class StockDataRepository:
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
+    async def iter_symbols(self, market: Optional[str] = None) -> AsyncIterator[Tuple[str, str]]:
+        """流式返回全部 (symbol, market)：只查这两列，按 QUOTE_STREAM_BATCH_SIZE 分批从服务端游标读取"""
+        stmt = select(StockQuote.symbol, StockQuote.market).execution_options(
+            yield_per=QUOTE_STREAM_BATCH_SIZE
+        )
+        if market:
+            stmt = stmt.where(StockQuote.market == market)
+        async for symbol, quote_market in await self.db.stream(stmt):
+            yield symbol, quote_market
+
     async def delete_quote(self, symbol: str, market: str) -> bool:
         stmt = select(StockQuote).where(
             StockQuote.symbol == symbol,
@@ -250,7 +267,6 @@ class StockDataRepository:
 
         if db_quote:
             await self.db.delete(db_quote)
-            await self.db.commit()
             return True
         return False
 
@@ -267,20 +283,33 @@ class StockDataRepository:
             .order_by(StockKline.datetime.desc())
             .limit(keep_latest)
         )
-        stmt = select(StockKline).where(
+        # 一条 DELETE ... WHERE id NOT IN (最新 keep_latest 条) 完成，不再逐行取回再删除
+        stmt = delete(StockKline).where(
             StockKline.symbol == symbol,
             StockKline.market == market,
             StockKline.interval == interval,
             ~StockKline.id.in_(subq),
         )
         result = await self.db.execute(stmt)
-        to_delete = result.scalars().all()
-
-        count = len(to_delete)
-        for kline in to_delete:
-            await self.db.delete(kline)
-
-        if count > 0:
-            await self.db.commit()
-
-        return count
+        return result.rowcount
+
+    async def prune_klines(self, market: str, interval: str, keep_latest: int = 500) -> int:
+        """按 (market, interval) 一次性裁剪所有股票的K线，每只股票只保留最新 keep_latest 条
+
+        ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY datetime DESC) 在库内排名，一条 DELETE 完成。
+        """
+        ranked = (
+            select(
+                StockKline.id,
+                func.row_number()
+                .over(partition_by=StockKline.symbol, order_by=StockKline.datetime.desc())
+                .label("rn"),
+            )
+            .where(StockKline.market == market, StockKline.interval == interval)
+            .cte("ranked")
+        )
+        stmt = delete(StockKline).where(
+            StockKline.id.in_(select(ranked.c.id).where(ranked.c.rn > keep_latest))
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from collections import defaultdict
 from datetime import datetime, timezone
 from typing import Optional, List
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -14,25 +15,61 @@ logger = logging.getLogger(__name__)
 
 scheduler: Optional[AsyncIOScheduler] = None
 
+WATCHLIST_REFRESH_CONCURRENCY = 8
+# 定时刷新时每批刷新的股票数（每批一个事务）
+REFRESH_BATCH_SIZE = 500
 
-async def refresh_all_quotes():
-    async with AsyncSessionLocal() as db:
-        repo = StockDataRepository(db)
-        all_quotes = await repo.get_all_quotes()
 
-        if not all_quotes:
-            logger.info("[Scheduler] No quotes to refresh")
-            return
+async def _refresh_in_batches(symbols: List[dict]) -> int:
+    """分批刷新行情，返回刷新成功数
+
+    每批使用独立会话，会话在外部行情拉取完成后才取得连接，一个事务写入后立即归还，不在拉取期间占用连接池。
+    """
+    refreshed = 0
+    for i in range(0, len(symbols), REFRESH_BATCH_SIZE):
+        async with AsyncSessionLocal() as db, db.begin():
+            batch = symbols[i:i + REFRESH_BATCH_SIZE]
+            refreshed += len(await market_data.batch_refresh_quotes(batch, db))
+    return refreshed
+
 
+async def _refresh_stored_quotes(market: Optional[str] = None) -> tuple[int, int]:
+    """刷新库中已有的全部行情，返回 (总数, 刷新成功数)
+
+    先用一个短会话读出全部 (symbol, market)（只查两列），随即归还连接，再分批刷新。
+    """
+    async with AsyncSessionLocal() as db:
+        repo = StockDataRepository(db)
         symbols = [
-            {"symbol": q.symbol, "market": q.market}
-            for q in all_quotes
+            {"symbol": symbol, "market": quote_market}
+            async for symbol, quote_market in repo.iter_symbols(market=market)
         ]
 
-        result = await market_data.batch_refresh_quotes(symbols, db)
-        logger.info(
-            f"[Scheduler] Refreshed {len(result)} quotes at {datetime.now(timezone.utc).isoformat()}"
-        )
+    return len(symbols), await _refresh_in_batches(symbols)
+
+
+async def refresh_hot_quotes():
+    """只刷新最近被读取过的代码；冷门代码由 refresh_all_quotes 低频刷新"""
+    symbols = await market_data.get_hot_symbols()
+    if not symbols:
+        logger.info("[Scheduler] No hot quotes to refresh")
+        return
+
+    refreshed = await _refresh_in_batches(symbols)
+    logger.info(
+        f"[Scheduler] Refreshed {refreshed}/{len(symbols)} hot quotes at {datetime.now(timezone.utc).isoformat()}"
+    )
+
+
+async def refresh_all_quotes():
+    total, refreshed = await _refresh_stored_quotes()
+    if not total:
+        logger.info("[Scheduler] No quotes to refresh")
+        return
+
+    logger.info(
+        f"[Scheduler] Refreshed {refreshed} quotes at {datetime.now(timezone.utc).isoformat()}"
+    )
 
 
 async def refresh_user_watchlists():
@@ -48,25 +85,35 @@ async def refresh_user_watchlists():
         result = await db.execute(stmt)
         watchlists = result.scalars().all()
 
-        watchlist_by_user = {}
+        watchlist_by_user = defaultdict(list)
         for w in watchlists:
-            if w.user_id not in watchlist_by_user:
-                watchlist_by_user[w.user_id] = []
             watchlist_by_user[w.user_id].append({
                 "symbol": w.symbol,
                 "market": w.market,
                 "name": w.name,
             })
 
-        for user_id, items in watchlist_by_user.items():
-            try:
-                result = await market_data.refresh_user_watchlist(items, db)
-                logger.info(
-                    f"[Scheduler] User {user_id}: "
-                    f"success={result['success']}, failed={result['failed']}"
-                )
-            except Exception as e:
-                logger.error(f"[Scheduler] Failed to refresh user {user_id}: {e}")
+    # 各用户的刷新相互独立，并发执行；每个任务使用自己的会话（AsyncSession 不能被并发使用）
+    semaphore = asyncio.Semaphore(WATCHLIST_REFRESH_CONCURRENCY)
+
+    async def _refresh(items):
+        async with semaphore:
+            async with AsyncSessionLocal() as user_db, user_db.begin():
+                return await market_data.refresh_user_watchlist(items, user_db)
+
+    user_ids = list(watchlist_by_user)
+    results = await asyncio.gather(
+        *(_refresh(watchlist_by_user[user_id]) for user_id in user_ids),
+        return_exceptions=True,
+    )
+    for user_id, result in zip(user_ids, results):
+        if isinstance(result, Exception):
+            logger.error(f"[Scheduler] Failed to refresh user {user_id}: {result}")
+        else:
+            logger.info(
+                f"[Scheduler] User {user_id}: "
+                f"success={result['success']}, failed={result['failed']}"
+            )
 
 
 async def cleanup_old_klines():
@@ -80,16 +127,13 @@ async def cleanup_old_klines():
         for market in markets:
             for interval in intervals:
                 try:
-                    count = await repo.delete_klines(
-                        symbol="*",  # This needs a different approach
-                        market=market,
-                        interval=interval,
-                        keep_latest=500,
-                    )
+                    count = await repo.prune_klines(market, interval, keep_latest=500)
+                    await db.commit()
                     if count > 0:
                         logger.info(f"[Scheduler] Cleaned {count} old klines for {market}/{interval}")
                 except Exception as e:
                     logger.error(f"[Scheduler] Failed to cleanup {market}/{interval}: {e}")
+                    await db.rollback()
 
 
 def start_scheduler():
@@ -100,10 +144,18 @@ def start_scheduler():
     scheduler = AsyncIOScheduler(timezone="UTC")
 
     scheduler.add_job(
-        refresh_all_quotes,
+        refresh_hot_quotes,
         trigger=IntervalTrigger(minutes=5),
+        id="refresh_hot_quotes",
+        name="Refresh recently read quotes every 5 minutes",
+        replace_existing=True,
+    )
+
+    scheduler.add_job(
+        refresh_all_quotes,
+        trigger=IntervalTrigger(minutes=60),
         id="refresh_all_quotes",
-        name="Refresh all cached quotes every 5 minutes",
+        name="Refresh all cached quotes every hour",
         replace_existing=True,
     )
 
@@ -130,23 +182,13 @@ def stop_scheduler():
 
 
 async def trigger_manual_refresh(market: Optional[str] = None) -> dict:
-    async with AsyncSessionLocal() as db:
-        repo = StockDataRepository(db)
-        all_quotes = await repo.get_all_quotes(market=market)
-
-        if not all_quotes:
-            return {"message": "No quotes found", "refreshed": 0}
-
-        symbols = [
-            {"symbol": q.symbol, "market": q.market}
-            for q in all_quotes
-        ]
-
-        result = await market_data.batch_refresh_quotes(symbols, db)
-
-        return {
-            "message": f"Refreshed {len(result)} quotes",
-            "refreshed": len(result),
-            "market": market or "all",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        }
+    total, refreshed = await _refresh_stored_quotes(market)
+    if not total:
+        return {"message": "No quotes found", "refreshed": 0}
+
+    return {
+        "message": f"Refreshed {refreshed} quotes",
+        "refreshed": refreshed,
+        "market": market or "all",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
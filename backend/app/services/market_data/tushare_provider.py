@@ -2,23 +2,67 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from functools import partial
 from typing import Optional, List
+from cachetools import LRUCache
 from app.config import settings
 from app.schemas.market import StockQuote, KlinePoint, FundamentalData
 from app.services.market_data.base import MarketDataProvider
 
 logger = logging.getLogger(__name__)
 
+# 批量行情只需每个代码最近一个交易日，回看窗口覆盖长假停市
+BATCH_QUOTE_LOOKBACK_DAYS = 15
+
+# 每类证券名称缓存的最大条目数
+NAME_CACHE_SIZE = 4096
+
+# 6 位代码的前两位：15/16 为深市 ETF，50/51 为沪市 ETF
+_ETF_PREFIXES = frozenset({"15", "16", "50", "51"})
+
+# 证券类型 -> (日线接口, 名称查询方法)
+_DAILY_ENDPOINTS = {
+    "hk": ("hk_daily", "_get_hk_name"),
+    "etf": ("fund_daily", "_get_etf_name"),
+    "cn": ("daily", "_get_cn_name"),
+}
+
+_KLINE_FREQ = {
+    "1day": "daily",
+    "1week": "weekly",
+    "1month": "monthly",
+}
+
+# (市场, 周期) -> K线接口；港股目前只有日线接口
+_KLINE_ENDPOINTS = {
+    ("hk", "daily"): "hk_daily",
+    ("hk", "weekly"): "hk_daily",
+    ("hk", "monthly"): "hk_daily",
+    ("cn", "daily"): "daily",
+    ("cn", "weekly"): "weekly",
+    ("cn", "monthly"): "monthly",
+}
+
+# TuShare SDK 是阻塞 HTTP 调用；使用独立线程池，批量刷新时不与默认 executor 上的其他阻塞 I/O 争抢线程
+_TUSHARE_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix="tushare")
+
+
+async def run_tushare(fn, /, *args, **kwargs):
+    """在 TuShare 专用线程池中执行阻塞的 SDK 调用"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_TUSHARE_EXECUTOR, partial(fn, *args, **kwargs))
+
 
 class TuShareProvider(MarketDataProvider):
     def __init__(self):
         self.token = settings.tushare_token
         self._api = None
-        self._hk_name_cache: dict = {}
-        self._cn_name_cache: dict = {}
-        self._etf_name_cache: dict = {}
+        # 名称几乎不变，但进程会长期运行：用有界 LRU 代替无限增长的 dict
+        self._hk_name_cache: LRUCache = LRUCache(maxsize=NAME_CACHE_SIZE)
+        self._cn_name_cache: LRUCache = LRUCache(maxsize=NAME_CACHE_SIZE)
+        self._etf_name_cache: LRUCache = LRUCache(maxsize=NAME_CACHE_SIZE)
 
     def _get_api(self):
         if self._api is None:
@@ -32,28 +76,17 @@ class TuShareProvider(MarketDataProvider):
         return symbol
 
     def _is_etf(self, symbol: str) -> bool:
-        code = symbol.split(".")[0]
-        if len(code) != 6:
-            return False
-        prefix = code[:2]
-        try:
-            num = int(prefix)
-            return (50 <= num <= 51 or 15 <= num <= 16)
-        except ValueError:
-            return False
+        code = symbol.partition(".")[0]
+        return len(code) == 6 and code[:2] in _ETF_PREFIXES
 
     async def _get_hk_name(self, symbol: str) -> Optional[str]:
         if symbol in self._hk_name_cache:
             return self._hk_name_cache[symbol]
         
         api = self._get_api()
-        loop = asyncio.get_event_loop()
         
         try:
-            data = await loop.run_in_executor(
-                None,
-                lambda: api.hk_basic(ts_code=symbol)
-            )
+            data = await run_tushare(api.hk_basic, ts_code=symbol)
             if data is not None and len(data) > 0:
                 name = data.iloc[0].get("name", "")
                 self._hk_name_cache[symbol] = name
@@ -68,13 +101,9 @@ class TuShareProvider(MarketDataProvider):
             return self._cn_name_cache[symbol]
         
         api = self._get_api()
-        loop = asyncio.get_event_loop()
         
         try:
-            data = await loop.run_in_executor(
-                None,
-                lambda: api.stock_basic(ts_code=symbol, fields="ts_code,name")
-            )
+            data = await run_tushare(api.stock_basic, ts_code=symbol, fields="ts_code,name")
             if data is not None and len(data) > 0:
                 name = data.iloc[0].get("name", "")
                 self._cn_name_cache[symbol] = name
@@ -89,13 +118,9 @@ class TuShareProvider(MarketDataProvider):
             return self._etf_name_cache[symbol]
         
         api = self._get_api()
-        loop = asyncio.get_event_loop()
         
         try:
-            data = await loop.run_in_executor(
-                None,
-                lambda: api.fund_basic(ts_code=symbol)
-            )
+            data = await run_tushare(api.fund_basic, ts_code=symbol)
             if data is not None and len(data) > 0:
                 name = data.iloc[0].get("name", "")
                 self._etf_name_cache[symbol] = name
@@ -105,39 +130,26 @@ class TuShareProvider(MarketDataProvider):
             logger.warning(f"[TuShare] 获取ETF名称失败 {symbol}: {e}")
         return None
 
-    async def get_quote(self, symbol: str) -> StockQuote:
-        logger.info(f"[TuShare] get_quote: symbol={symbol}")
+    def _security_kind(self, symbol: str) -> str:
+        if symbol.endswith(".HK"):
+            return "hk"
+        return "etf" if self._is_etf(symbol) else "cn"
 
+    async def _fetch_daily(self, symbol: str, limit: Optional[int] = None):
+        """按证券类型（港股 / ETF / A股）调用对应日线接口，返回 (DataFrame, 名称)"""
         api = self._get_api()
         ts_code = self._code_to_ts(symbol)
 
-        loop = asyncio.get_event_loop()
-        is_hk = symbol.endswith(".HK")
-        is_etf = self._is_etf(symbol)
+        endpoint, name_getter = _DAILY_ENDPOINTS[self._security_kind(symbol)]
+        kwargs = {"ts_code": ts_code}
+        if limit:
+            kwargs["limit"] = limit
 
         name = None
         try:
-            if is_hk:
-                data = await loop.run_in_executor(
-                    None,
-                    lambda: api.hk_daily(ts_code=ts_code)
-                )
-                if data is not None and len(data) > 0:
-                    name = await self._get_hk_name(ts_code)
-            elif is_etf:
-                data = await loop.run_in_executor(
-                    None,
-                    lambda: api.fund_daily(ts_code=ts_code)
-                )
-                if data is not None and len(data) > 0:
-                    name = await self._get_etf_name(ts_code)
-            else:
-                data = await loop.run_in_executor(
-                    None,
-                    lambda: api.daily(ts_code=ts_code)
-                )
-                if data is not None and len(data) > 0:
-                    name = await self._get_cn_name(ts_code)
+            data = await run_tushare(getattr(api, endpoint), **kwargs)
+            if data is not None and len(data) > 0:
+                name = await getattr(self, name_getter)(ts_code)
         except Exception as e:
             logger.error(f"[TuShare] Failed to get quote: {e}")
             raise ValueError(f"TuShare API error for {symbol}: {str(e)}")
@@ -145,8 +157,10 @@ class TuShareProvider(MarketDataProvider):
         if data is None or len(data) == 0:
             raise ValueError(f"No data for {symbol}")
 
-        row = data.iloc[0]
-        market = "hk" if is_hk else "cn"
+        return data, name
+
+    def _row_to_quote(self, symbol: str, row, name: Optional[str]) -> StockQuote:
+        market = "hk" if symbol.endswith(".HK") else "cn"
 
         return StockQuote(
             symbol=symbol,
@@ -163,6 +177,67 @@ class TuShareProvider(MarketDataProvider):
             timestamp=datetime.strptime(row.get("trade_date"), "%Y%m%d") if row.get("trade_date") else None,
         )
 
+    def _frame_to_klines(self, data) -> List[KlinePoint]:
+        # 按列转换：每列一次 to_numpy()/tolist()，而不是 iterrows() 把每行装箱成 Series
+        # trade_date 为 YYYYMMDD，直接切片拼成 ISO 字符串，省去逐行 strptime + isoformat
+        datetimes = [f"{d[:4]}-{d[4:6]}-{d[6:8]}T00:00:00" for d in data["trade_date"].tolist()]
+        opens = data["open"].to_numpy(dtype=float).tolist()
+        highs = data["high"].to_numpy(dtype=float).tolist()
+        lows = data["low"].to_numpy(dtype=float).tolist()
+        closes = data["close"].to_numpy(dtype=float).tolist()
+        # 成交量为 0 / 缺失时记为 None
+        volumes = [int(v) if v else None for v in data["vol"].fillna(0).tolist()]
+
+        return [
+            KlinePoint(datetime=dt, open=o, high=h, low=l, close=c, volume=v)
+            for dt, o, h, l, c, v in zip(datetimes, opens, highs, lows, closes, volumes)
+        ]
+
+    async def get_quote(self, symbol: str) -> StockQuote:
+        logger.info(f"[TuShare] get_quote: symbol={symbol}")
+
+        data, name = await self._fetch_daily(symbol)
+        return self._row_to_quote(symbol, data.iloc[0], name)
+
+    async def get_quotes_batch(self, symbols: List[str]) -> List[StockQuote]:
+        """A股批量行情：daily 接口接受逗号分隔的 ts_code，一次请求取回全部代码；查不到的代码被跳过"""
+        logger.info(f"[TuShare] get_quotes_batch: {len(symbols)} symbols")
+
+        api = self._get_api()
+        ts_codes = ",".join(self._code_to_ts(symbol) for symbol in symbols)
+        start_date = (datetime.now() - timedelta(days=BATCH_QUOTE_LOOKBACK_DAYS)).strftime("%Y%m%d")
+
+        try:
+            data = await run_tushare(api.daily, ts_code=ts_codes, start_date=start_date)
+        except Exception as e:
+            logger.error(f"[TuShare] Failed to get batch quotes: {e}")
+            raise ValueError(f"TuShare API error for batch quote: {str(e)}")
+
+        if data is None or len(data) == 0:
+            return []
+
+        latest = data.sort_values("trade_date", ascending=False).drop_duplicates("ts_code")
+        rows = {row["ts_code"]: row for _, row in latest.iterrows()}
+
+        quotes = []
+        for symbol in symbols:
+            ts_code = self._code_to_ts(symbol)
+            row = rows.get(ts_code)
+            if row is None:
+                continue
+            name = await self._get_cn_name(ts_code)
+            quotes.append(self._row_to_quote(symbol, row, name))
+        return quotes
+
+    async def get_market_context(
+        self, symbol: str, outputsize: int = 100
+    ) -> tuple[StockQuote, List[KlinePoint]]:
+        """一次日线调用同时得到最新行情（首行）和K线序列"""
+        logger.info(f"[TuShare] get_market_context: symbol={symbol}, outputsize={outputsize}")
+
+        data, name = await self._fetch_daily(symbol, limit=outputsize)
+        return self._row_to_quote(symbol, data.iloc[0], name), self._frame_to_klines(data)
+
     async def get_kline(
         self,
         symbol: str,
@@ -175,50 +250,13 @@ class TuShareProvider(MarketDataProvider):
         ts_code = self._code_to_ts(symbol)
 
         is_hk = symbol.endswith(".HK")
-
-        interval_map = {
-            "1day": "daily",
-            "1week": "weekly",
-            "1month": "monthly",
-        }
-        freq = interval_map.get(interval, "daily")
-
-        loop = asyncio.get_event_loop()
+        freq = _KLINE_FREQ.get(interval, "daily")
+        if is_hk and freq != "daily":
+            logger.warning(f"[TuShare] HK stock only supports daily interval currently")
+        endpoint = _KLINE_ENDPOINTS[("hk" if is_hk else "cn", freq)]
 
         try:
-            if is_hk:
-                if freq == "daily":
-                    data = await loop.run_in_executor(
-                        None,
-                        lambda: api.hk_daily(ts_code=ts_code, limit=outputsize)
-                    )
-                else:
-                    logger.warning(f"[TuShare] HK stock only supports daily interval currently")
-                    data = await loop.run_in_executor(
-                        None,
-                        lambda: api.hk_daily(ts_code=ts_code, limit=outputsize)
-                    )
-            else:
-                if freq == "daily":
-                    data = await loop.run_in_executor(
-                        None,
-                        lambda: api.daily(ts_code=ts_code, limit=outputsize)
-                    )
-                elif freq == "weekly":
-                    data = await loop.run_in_executor(
-                        None,
-                        lambda: api.weekly(ts_code=ts_code, limit=outputsize)
-                    )
-                elif freq == "monthly":
-                    data = await loop.run_in_executor(
-                        None,
-                        lambda: api.monthly(ts_code=ts_code, limit=outputsize)
-                    )
-                else:
-                    data = await loop.run_in_executor(
-                        None,
-                        lambda: api.daily(ts_code=ts_code, limit=outputsize)
-                    )
+            data = await run_tushare(getattr(api, endpoint), ts_code=ts_code, limit=outputsize)
         except Exception as e:
             logger.error(f"[TuShare] Failed to get kline: {e}")
             raise ValueError(f"TuShare API error for {symbol}: {str(e)}")
@@ -226,38 +264,17 @@ class TuShareProvider(MarketDataProvider):
         if data is None or len(data) == 0:
             raise ValueError(f"No kline data for {symbol}")
 
-        result = []
-        for _, row in data.iterrows():
-            dt = datetime.strptime(row.get("trade_date"), "%Y%m%d")
-            result.append(
-                KlinePoint(
-                    datetime=dt.isoformat(),
-                    open=float(row.get("open", 0)),
-                    high=float(row.get("high", 0)),
-                    low=float(row.get("low", 0)),
-                    close=float(row.get("close", 0)),
-                    volume=int(row.get("vol", 0)) if row.get("vol") else None,
-                )
-            )
-
-        return result
+        return self._frame_to_klines(data)
 
     async def search(self, query: str) -> List[dict]:
         logger.info(f"[TuShare] search: query={query}")
 
         api = self._get_api()
-        loop = asyncio.get_event_loop()
 
         try:
-            data = await loop.run_in_executor(
-                None,
-                lambda: api.stock_basic(ts_code=query, exchange="", fields="ts_code,symbol,name,exchange,list_status")
-            )
+            data = await run_tushare(api.stock_basic, ts_code=query, exchange="", fields="ts_code,symbol,name,exchange,list_status")
             if data is None or len(data) == 0:
-                data = await loop.run_in_executor(
-                    None,
-                    lambda: api.stock_basic(exchange="", list_status="L", fields="ts_code,symbol,name,exchange,list_status")
-                )
+                data = await run_tushare(api.stock_basic, exchange="", list_status="L", fields="ts_code,symbol,name,exchange,list_status")
                 data = data[data["name"].str.contains(query, na=False) | data["symbol"].str.contains(query, na=False)]
         except Exception as e:
             logger.warning(f"[TuShare] Search failed: {e}")
@@ -279,17 +296,12 @@ class TuShareProvider(MarketDataProvider):
 
         api = self._get_api()
         ts_code = self._code_to_ts(symbol)
-        loop = asyncio.get_event_loop()
 
         try:
-            info = await loop.run_in_executor(
-                None,
-                lambda: api.stock_basic(ts_code=ts_code, fields="ts_code,symbol,name,market,exchange,list_status")
-            )
-
-            daily = await loop.run_in_executor(
-                None,
-                lambda: api.daily(ts_code=ts_code, limit=1)
+            # 两个接口互不依赖，并发请求
+            info, daily = await asyncio.gather(
+                run_tushare(api.stock_basic, ts_code=ts_code, fields="ts_code,symbol,name,market,exchange,list_status"),
+                run_tushare(api.daily, ts_code=ts_code, limit=1),
             )
 
             if info is None or len(info) == 0:
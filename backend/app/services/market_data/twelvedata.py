@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
-from datetime import datetime
-from typing import Optional, List
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
 import httpx
+import orjson
 import yfinance as yf
 from functools import partial
 from yahooquery import Ticker
@@ -12,8 +16,44 @@ from app.config import settings
 from app.schemas.market import StockQuote, KlinePoint, FundamentalData
 from app.services.market_data.base import MarketDataProvider
 
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
 logger = logging.getLogger(__name__)
 BASE_URL = "https://api.twelvedata.com"
+# 同时进行的 yahooquery 基本面请求上限，避免批量拉取时触发 Yahoo 限流
+YAHOO_MAX_CONCURRENCY = 8
+# /quote 支持逗号分隔的多代码查询：窗口期内的 get_quote 合并为一次请求，凑满批量上限时立即发出
+QUOTE_BATCH_SIZE = 8
+QUOTE_BATCH_WINDOW = 0.03
+
+# 上游请求重试：连接错误 / 限流 / 5xx 按指数退避（带抖动）最多尝试 RETRY_ATTEMPTS 次
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 4.0
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+# 每个上游同时在途的请求上限：批量刷新时的并发突发不至于触发 Binance 的权重限流 / TwelveData 的每分钟额度
+TWELVEDATA_MAX_CONCURRENCY = 8
+BINANCE_MAX_CONCURRENCY = 10
+# 熔断：同一上游连续 BREAKER_FAIL_MAX 次请求（含重试）失败后，BREAKER_RESET_SECONDS 内直接失败
+BREAKER_FAIL_MAX = 5
+BREAKER_RESET_SECONDS = 30.0
+
+# TwelveData 周期名 -> Binance 周期名
+_BINANCE_INTERVALS = {
+    "1min": "1m",
+    "5min": "5m",
+    "15min": "15m",
+    "30min": "30m",
+    "1h": "1h",
+    "4h": "4h",
+    "1day": "1d",
+    "1week": "1w",
+}
+# Binance /api/v3/klines 单次最多返回 1000 根
+BINANCE_KLINE_MAX_LIMIT = 1000
 
 
 def _safe_float(val) -> Optional[float]:
@@ -25,9 +65,131 @@ def _safe_float(val) -> Optional[float]:
         return None
 
 
+@functools.lru_cache(maxsize=1024)
+def _parse_pair(symbol: str) -> tuple[str, str]:
+    """解析加密货币交易对，如 BTC/USD -> ("BTC", "BTCUSDT")；Binance 以 USDT 代替 USD，未写计价币时默认 USD"""
+    base, _, quote = symbol.partition("/")
+    base = base.upper()
+    quote = (quote or "USD").upper()
+    if quote == "USD":
+        quote = "USDT"
+    return base, f"{base}{quote}"
+
+
+def _settle(futures: List[asyncio.Future], result=None, exception: Optional[BaseException] = None) -> None:
+    for future in futures:
+        if future.done():
+            continue
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+class CircuitOpenError(Exception):
+    """上游熔断中，请求未发出；调用方应回退到已有数据，不能当作空结果或 0 价格"""
+
+
+class _CircuitBreaker:
+    """按上游主机计数的熔断器：连续失败达到阈值后断开，冷却期过后放行试探请求，成功即复位"""
+
+    def __init__(self, fail_max: int = BREAKER_FAIL_MAX, reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        return self._opened_at is None or time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.fail_max:
+            self._opened_at = time.monotonic()
+
+
 class TwelveDataProvider(MarketDataProvider):
     def __init__(self):
         self.api_key = settings.twelvedata_api_key
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._yahoo_semaphore = asyncio.Semaphore(YAHOO_MAX_CONCURRENCY)
+        # simdjson 解析器可复用；K线行按下标惰性取值，不为丢弃的 6 个字段创建 Python 对象
+        self._sjson = simdjson.Parser() if simdjson is not None else None
+        self._pending_quotes: Dict[str, List[asyncio.Future]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self._breakers: Dict[str, _CircuitBreaker] = {
+            "twelvedata": _CircuitBreaker(),
+            "binance": _CircuitBreaker(),
+        }
+        self._semaphores: Dict[str, asyncio.Semaphore] = self._new_semaphores()
+
+    @staticmethod
+    def _new_semaphores() -> Dict[str, asyncio.Semaphore]:
+        return {
+            "twelvedata": asyncio.Semaphore(TWELVEDATA_MAX_CONCURRENCY),
+            "binance": asyncio.Semaphore(BINANCE_MAX_CONCURRENCY),
+        }
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """复用连接池：TwelveData / Binance 的重复请求不再每次重新握手 TCP + TLS
+
+        连接池和并发信号量绑定创建时的事件循环；Celery 任务每次新建事件循环，循环变化时重建，
+        旧循环已关闭，其上的连接无法再 aclose，直接丢弃。
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0),
+                http2=True,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            )
+            self._client_loop = loop
+            self._semaphores = self._new_semaphores()
+        return self._client
+
+    async def aclose(self):
+        if self._client is None:
+            return
+        if self._client_loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+    async def _get(self, host: str, url: str, *, params: dict, timeout: float) -> httpx.Response:
+        """带重试与熔断的 GET；重试耗尽后返回最后一次响应或抛出最后一次连接错误"""
+        breaker = self._breakers[host]
+        if not breaker.allow():
+            raise CircuitOpenError(f"{host} circuit open, skipping request to {url}")
+
+        client = await self._get_client()
+        semaphore = self._semaphores[host]
+        for attempt in range(RETRY_ATTEMPTS):
+            error: Optional[httpx.TransportError] = None
+            try:
+                # 只在请求期间占用并发名额，退避等待时释放
+                async with semaphore:
+                    resp = await client.get(url, params=params, timeout=timeout)
+            except httpx.TransportError as e:
+                error = e
+            else:
+                if resp.status_code not in _RETRY_STATUS:
+                    breaker.record_success()
+                    return resp
+            if attempt + 1 < RETRY_ATTEMPTS:
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+                logger.warning(f"[TwelveData] {host} request failed (attempt {attempt + 1}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+        breaker.record_failure()
+        if error is not None:
+            raise error
+        return resp
 
     def _params(self, **kwargs) -> dict:
         return {"apikey": self.api_key, **kwargs}
@@ -37,18 +199,63 @@ class TwelveDataProvider(MarketDataProvider):
         
         if "/" in symbol:
             return await self._get_crypto_quote(symbol)
-        
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_quotes.setdefault(symbol, []).append(future)
+        if len(self._pending_quotes) >= QUOTE_BATCH_SIZE:
+            self._flush_quotes()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(QUOTE_BATCH_WINDOW, self._flush_quotes)
+        return await future
+
+    def _flush_quotes(self) -> None:
+        """把当前攒下的代码交给后台任务批量请求"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending_quotes = self._pending_quotes, {}
+        if not batch:
+            return
+        task = asyncio.create_task(self._fetch_quote_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _fetch_quote_batch(self, batch: Dict[str, List[asyncio.Future]]) -> None:
+        symbols = list(batch)
+        logger.info(f"[TwelveData] batch quote: symbols={symbols}")
+
+        try:
+            resp = await self._get(
+                "twelvedata",
                 f"{BASE_URL}/quote",
-                params=self._params(symbol=symbol),
+                params=self._params(symbol=",".join(symbols)),
                 timeout=10,
             )
             resp.raise_for_status()
-            data = resp.json()
+            data = orjson.loads(resp.content)
+            if data.get("status") == "error":
+                error_msg = data.get("message", "Unknown error")
+                raise ValueError(f"TwelveData API error for {','.join(symbols)}: {error_msg}")
+        except Exception as e:
+            for futures in batch.values():
+                _settle(futures, exception=e)
+            return
 
-        logger.info(f"[TwelveData] get_quote response: {data}")
+        # 单个代码时接口直接返回报价对象，多个代码时按代码分组返回
+        by_symbol = {symbols[0]: data} if len(symbols) == 1 else data
+        for symbol, futures in batch.items():
+            try:
+                quote = self._to_stock_quote(symbol, by_symbol.get(symbol))
+            except Exception as e:
+                _settle(futures, exception=e)
+            else:
+                _settle(futures, result=quote)
 
+    @staticmethod
+    def _to_stock_quote(symbol: str, data: Optional[dict]) -> StockQuote:
+        if not data:
+            raise ValueError(f"TwelveData API error for {symbol}: symbol missing from batch response")
         if data.get("status") == "error":
             error_msg = data.get("message", "Unknown error")
             raise ValueError(f"TwelveData API error for {symbol}: {error_msg}")
@@ -56,10 +263,8 @@ class TwelveDataProvider(MarketDataProvider):
         market = "us"
         if ".HK" in symbol.upper():
             market = "hk"
-        elif "/" in symbol:
-            market = "commodity"
 
-        return StockQuote(
+        return StockQuote.model_construct(
             symbol=data.get("symbol", symbol),
             name=data.get("name"),
             market=market,
@@ -76,49 +281,34 @@ class TwelveDataProvider(MarketDataProvider):
     async def _get_crypto_quote(self, symbol: str) -> StockQuote:
         logger.info(f"[TwelveData] _get_crypto_quote: symbol={symbol}")
         
-        parts = symbol.split("/")
-        base = parts[0].upper()
-        quote = parts[1].upper() if len(parts) > 1 else "USD"
-        
-        if quote == "USD":
-            quote = "USDT"
-        
-        trading_pair = f"{base}{quote}"
-        
-        try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(
-                    f"https://api.binance.com/api/v3/ticker/24hr",
-                    params={"symbol": trading_pair},
-                    timeout=10,
-                )
-                
-            if resp.status_code == 429:
-                logger.warning(f"[TwelveData] Binance rate limited")
-                return StockQuote(symbol=symbol, name=base, market="commodity", price=0)
-            
-            if resp.status_code != 200:
-                logger.warning(f"[TwelveData] Binance returned {resp.status_code} for {trading_pair}")
-                return StockQuote(symbol=symbol, name=symbol, market="commodity", price=0)
-            
-            data = resp.json()
-            
-            if "lastPrice" in data:
-                return StockQuote(
-                    symbol=symbol,
-                    name=base,
-                    market="commodity",
-                    price=float(data.get("lastPrice", 0)),
-                    change_percent=float(data.get("priceChangePercent", 0)) if data.get("priceChangePercent") else None,
-                )
-        except Exception as e:
-            logger.error(f"[TwelveData] Failed to get crypto quote: {e}")
+        base, trading_pair = _parse_pair(symbol)
         
+        # 任何失败都抛出：0 价格会被调用方当作真实行情写入数据库和缓存，抛出后才能回退到已有数据
+        resp = await self._get(
+            "binance",
+            f"https://api.binance.com/api/v3/ticker/24hr",
+            params={"symbol": trading_pair},
+            timeout=10,
+        )
+
+        if resp.status_code == 429:
+            logger.warning(f"[TwelveData] Binance rate limited")
+            raise ValueError(f"Binance rate limited for {trading_pair}")
+
+        if resp.status_code != 200:
+            logger.warning(f"[TwelveData] Binance returned {resp.status_code} for {trading_pair}")
+            raise ValueError(f"Binance returned {resp.status_code} for {trading_pair}")
+
+        data = orjson.loads(resp.content)
+        if "lastPrice" not in data:
+            raise ValueError(f"Binance ticker for {trading_pair} has no lastPrice")
+
         return StockQuote(
             symbol=symbol,
-            name=symbol,
+            name=base,
             market="commodity",
-            price=0,
+            price=float(data["lastPrice"]),
+            change_percent=float(data.get("priceChangePercent", 0)) if data.get("priceChangePercent") else None,
         )
 
     async def get_kline(
@@ -127,28 +317,29 @@ class TwelveDataProvider(MarketDataProvider):
         if "/" in symbol:
             return await self._get_crypto_kline(symbol, interval, outputsize)
         
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{BASE_URL}/time_series",
-                params=self._params(
-                    symbol=symbol,
-                    interval=interval,
-                    outputsize=outputsize,
-                    order="ASC",
-                ),
-                timeout=15,
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await self._get(
+            "twelvedata",
+            f"{BASE_URL}/time_series",
+            params=self._params(
+                symbol=symbol,
+                interval=interval,
+                outputsize=outputsize,
+                order="ASC",
+            ),
+            timeout=15,
+        )
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
 
         if data.get("status") == "error":
             error_msg = data.get("message", "Unknown error")
             raise ValueError(f"TwelveData API error for {symbol}: {error_msg}")
 
+        # 字段已逐个转换为目标类型，model_construct 跳过重复的 pydantic 校验
         values = data.get("values", [])
         return [
-            KlinePoint(
-                datetime=v["datetime"],
+            KlinePoint.model_construct(
+                datetime=datetime.fromisoformat(v["datetime"]),
                 open=float(v["open"]),
                 high=float(v["high"]),
                 low=float(v["low"]),
@@ -163,81 +354,65 @@ class TwelveDataProvider(MarketDataProvider):
     ) -> List[KlinePoint]:
         logger.info(f"[TwelveData] _get_crypto_kline: symbol={symbol}, interval={interval}")
         
-        parts = symbol.split("/")
-        base = parts[0].upper()
-        quote = parts[1].upper() if len(parts) > 1 else "USD"
-        
-        if quote == "USD":
-            quote = "USDT"
-        
-        trading_pair = f"{base}{quote}"
-        
-        interval_map = {
-            "1min": "1m",
-            "5min": "5m",
-            "15m": "15m",
-            "30m": "30m",
-            "1h": "1h",
-            "4h": "4h",
-            "1day": "1d",
-            "1week": "1w",
-        }
-        binance_interval = interval_map.get(interval, "1d")
+        _, trading_pair = _parse_pair(symbol)
         
-        limit_map = {
-            "1m": 1500,
-            "5min": 1200,
-            "15m": 1000,
-            "30m": 1000,
-            "1h": 1000,
-            "4h": 1000,
-            "1day": 1000,
-            "1week": 1000,
-        }
-        limit = min(limit_map.get(interval, 1000), outputsize)
+        binance_interval = _BINANCE_INTERVALS.get(interval, "1d")
+        limit = min(BINANCE_KLINE_MAX_LIMIT, outputsize)
         
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(
-                    f"https://api.binance.com/api/v3/klines",
-                    params={"symbol": trading_pair, "interval": binance_interval, "limit": limit},
-                    timeout=15,
-                )
+            resp = await self._get(
+                "binance",
+                f"https://api.binance.com/api/v3/klines",
+                params={"symbol": trading_pair, "interval": binance_interval, "limit": limit},
+                timeout=15,
+            )
             
             if resp.status_code != 200:
                 logger.warning(f"[TwelveData] Binance klines returned {resp.status_code}")
                 return []
             
-            data = resp.json()
-            
-            if data:
-                return [
-                    KlinePoint(
-                        datetime=datetime.fromtimestamp(v[0] / 1000).strftime("%Y-%m-%d %H:%M:%S"),
-                        open=float(v[1]),
-                        high=float(v[2]),
-                        low=float(v[3]),
-                        close=float(v[4]),
-                        volume=int(float(v[5])),
-                    )
-                    for v in data[-outputsize:]
-                ]
+            return self._parse_binance_klines(resp.content, outputsize)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"[TwelveData] Failed to get crypto kline: {e}")
         
         return []
 
+    def _parse_binance_klines(self, content: bytes, outputsize: int) -> List[KlinePoint]:
+        """Binance K线数组（每行 12 个字段）只取前 6 个字段转换为 KlinePoint"""
+        if self._sjson is not None:
+            # 同步完成解析与取值：返回后文档代理即被释放，解析器可安全复用
+            data = self._sjson.parse(content)
+        else:
+            data = orjson.loads(content)
+
+        # limit 已按 outputsize 截断，通常整批都要：直接遍历，不复制切片
+        count = len(data)
+        rows = data if count <= outputsize else (data[i] for i in range(count - outputsize, count))
+        return [
+            KlinePoint.model_construct(
+                datetime=datetime.fromtimestamp(v[0] / 1000, tz=timezone.utc),
+                open=float(v[1]),
+                high=float(v[2]),
+                low=float(v[3]),
+                close=float(v[4]),
+                volume=int(float(v[5])),
+            )
+            for v in rows
+        ]
+
     async def search(self, query: str) -> List[dict]:
         logger.info(f"[TwelveData] search: query={query}")
 
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{BASE_URL}/symbol_search",
-                params=self._params(symbol=query, outputsize=10),
-                timeout=10,
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await self._get(
+            "twelvedata",
+            f"{BASE_URL}/symbol_search",
+            params=self._params(symbol=query, outputsize=10),
+            timeout=10,
+        )
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
 
         logger.info(f"[TwelveData] search response: {data}")
 
@@ -257,17 +432,18 @@ class TwelveDataProvider(MarketDataProvider):
         ]
 
     async def get_fundamentals(self, symbol: str) -> Optional[FundamentalData]:
-        import asyncio
-        
         market = "hk" if ".HK" in symbol.upper() else "us"
         
         if market == "us":
             try:
                 ticker = Ticker(symbol)
-                loop = asyncio.get_event_loop()
-                
-                stats = await loop.run_in_executor(None, lambda: ticker.key_stats)
-                summary = await loop.run_in_executor(None, lambda: ticker.summary_detail)
+
+                # key_stats 与 summary_detail 是两次独立的阻塞请求，并发执行
+                async with self._yahoo_semaphore:
+                    stats, summary = await asyncio.gather(
+                        asyncio.to_thread(lambda: ticker.key_stats),
+                        asyncio.to_thread(lambda: ticker.summary_detail),
+                    )
                 
                 s = stats.get(symbol, {})
                 sm = summary.get(symbol, {})
@@ -12,8 +12,48 @@ from bs4 import BeautifulSoup
 from app.services.news.fetchers import NewsArticleData, NewsFetcher
 from app.services.news.crawler_base import BaseCrawler, CrawlerConfig
 
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
 logger = logging.getLogger(__name__)
 
+# 交易所后缀：只去掉末尾的 .HK / .SH / .SZ
+_EXCHANGE_SUFFIX_RE = re.compile(r'\.(?:HK|SH|SZ)$')
+# Yahoo 新闻列表项
+_YAHOO_ITEM_SELECTOR = 'li[class*="stream-item"]'
+
+
+def _parse_yahoo_items(html: str, max_articles: int) -> List[tuple[str, str, Optional[str]]]:
+    """从 Yahoo 新闻页提取 (标题, 链接, 摘要)；优先用 selectolax（C 实现），未安装时退回 BeautifulSoup + lxml"""
+    items = []
+    if HTMLParser is not None:
+        for node in HTMLParser(html).css(_YAHOO_ITEM_SELECTOR)[:max_articles]:
+            link = node.css_first('a')
+            if link is None:
+                continue
+            summary = node.css_first('p')
+            items.append((
+                link.text(strip=True),
+                link.attributes.get('href') or '',
+                summary.text(strip=True) if summary is not None else None,
+            ))
+        return items
+
+    soup = BeautifulSoup(html, 'lxml')
+    for node in soup.select(_YAHOO_ITEM_SELECTOR)[:max_articles]:
+        link = node.find('a')
+        if not link:
+            continue
+        summary = node.find('p')
+        items.append((
+            link.get_text(strip=True),
+            link.get('href', ''),
+            summary.get_text(strip=True) if summary else None,
+        ))
+    return items
+
 
 class YahooFinanceCrawler(BaseCrawler):
     """Yahoo Finance 新闻爬虫（免费）"""
@@ -24,35 +64,22 @@ class YahooFinanceCrawler(BaseCrawler):
         articles = []
         try:
             if symbol:
-                clean_symbol = symbol.replace(".HK", "").replace(".SH", "").replace(".SZ", "")
+                clean_symbol = _EXCHANGE_SUFFIX_RE.sub('', symbol)
                 url = f"{self.BASE_URL}/quote/{clean_symbol}/news"
             else:
                 url = f"{self.BASE_URL}/news"
 
             self.stats["total_requests"] += 1
             html = await self.session.fetch_text(url)
-            soup = BeautifulSoup(html, 'html.parser')
 
             # 查找新闻列表
-            news_items = soup.select('li[class*="stream-item"]')[:max_articles]
-
-            for item in news_items:
+            for title, href, content in _parse_yahoo_items(html, max_articles):
                 try:
-                    link = item.find('a')
-                    if not link:
-                        continue
-
-                    title = link.get_text(strip=True)
-                    article_url = urljoin(self.BASE_URL, link.get('href', ''))
-
-                    summary = item.find('p')
-                    content = summary.get_text(strip=True) if summary else None
-
                     article = NewsArticleData(
                         source="yahoo_finance",
                         title=title,
                         content=content,
-                        url=article_url,
+                        url=urljoin(self.BASE_URL, href),
                         author="Yahoo Finance",
                         published_at=datetime.now(timezone.utc),
                         symbols=[symbol] if symbol else [],
@@ -86,7 +113,7 @@ class EastMoneyCrawler(BaseCrawler):
             }
 
             if symbol and symbol.endswith(('.SH', '.SZ')):
-                params['stock_list'] = symbol.split('.')[0]
+                params['stock_list'] = symbol[:-3]
 
             self.stats["total_requests"] += 1
             data = await self.session.fetch_json(self.API_URL, params=params)
@@ -172,41 +199,56 @@ class SinaFinanceCrawler(BaseCrawler):
         return articles
 
 
-# 包装类，实现NewsFetcher接口
+# 包装类，实现NewsFetcher接口；爬虫（及其连接池）在实例内复用
 class YahooFinanceFetcher(NewsFetcher):
     """Yahoo Finance爬虫封装"""
-    async def fetch_news(self, symbol: Optional[str] = None, max_articles: int = 10) -> List[NewsArticleData]:
-        config = CrawlerConfig(
+    def __init__(self):
+        self._crawler = YahooFinanceCrawler(CrawlerConfig(
             requests_per_second=2.0,
             max_retries=3,
             connect_timeout=10.0,
             read_timeout=30.0
-        )
-        crawler = YahooFinanceCrawler(config)
-        return await crawler.run(symbol=symbol, max_articles=max_articles)
+        ))
+
+    async def fetch_news(self, symbol: Optional[str] = None, max_articles: int = 10) -> List[NewsArticleData]:
+        self._crawler.http_session = self.session
+        return await self._crawler.run(symbol=symbol, max_articles=max_articles)
+
+    async def aclose(self):
+        await self._crawler.aclose()
 
 
 class EastMoneyFetcher(NewsFetcher):
     """东方财富网爬虫封装"""
-    async def fetch_news(self, symbol: Optional[str] = None, max_articles: int = 10) -> List[NewsArticleData]:
-        config = CrawlerConfig(
+    def __init__(self):
+        self._crawler = EastMoneyCrawler(CrawlerConfig(
             requests_per_second=3.0,
             max_retries=3,
             connect_timeout=10.0,
             read_timeout=30.0
-        )
-        crawler = EastMoneyCrawler(config)
-        return await crawler.run(symbol=symbol, max_articles=max_articles)
+        ))
+
+    async def fetch_news(self, symbol: Optional[str] = None, max_articles: int = 10) -> List[NewsArticleData]:
+        self._crawler.http_session = self.session
+        return await self._crawler.run(symbol=symbol, max_articles=max_articles)
+
+    async def aclose(self):
+        await self._crawler.aclose()
 
 
 class SinaFinanceFetcher(NewsFetcher):
     """新浪财经爬虫封装"""
-    async def fetch_news(self, symbol: Optional[str] = None, max_articles: int = 10) -> List[NewsArticleData]:
-        config = CrawlerConfig(
+    def __init__(self):
+        self._crawler = SinaFinanceCrawler(CrawlerConfig(
             requests_per_second=3.0,
             max_retries=3,
             connect_timeout=10.0,
             read_timeout=30.0
-        )
-        crawler = SinaFinanceCrawler(config)
-        return await crawler.run(symbol=symbol, max_articles=max_articles)
+        ))
+
+    async def fetch_news(self, symbol: Optional[str] = None, max_articles: int = 10) -> List[NewsArticleData]:
+        self._crawler.http_session = self.session
+        return await self._crawler.run(symbol=symbol, max_articles=max_articles)
+
+    async def aclose(self):
+        await self._crawler.aclose()
@@ -9,11 +9,17 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from abc import ABC, abstractmethod
 import aiohttp
+import orjson
+from cachetools import TTLCache
 from fake_useragent import UserAgent
 from functools import wraps
 
 logger = logging.getLogger(__name__)
 
+# 每个爬虫会话的连接池上限与 DNS 缓存时长（秒）
+CRAWLER_CONNECTION_LIMIT = 32
+CRAWLER_DNS_CACHE_TTL = 300
+
 
 @dataclass
 class CrawlerConfig:
@@ -43,6 +49,7 @@ class CrawlerConfig:
     # 缓存配置
     enable_cache: bool = True
     cache_ttl: int = 3600  # 秒
+    cache_max_entries: int = 1024  # 超出后淘汰最久未使用的条目
 
 
 class RateLimiter:
@@ -116,11 +123,31 @@ class ProxyManager:
             logger.warning(f"Proxy {proxy} marked as failed")
 
 
+@dataclass(slots=True)
+class CachedResponse:
+    """已读取完的响应体：连接释放后以及缓存命中时都可以重复读取"""
+    status: int
+    body: bytes
+    encoding: str
+
+    def text(self) -> str:
+        return self.body.decode(self.encoding, errors="replace")
+
+    def json(self) -> Any:
+        return orjson.loads(self.body)
+
+
 class CrawlerSession:
     """爬虫会话管理器"""
 
-    def __init__(self, config: CrawlerConfig):
+    def __init__(self, config: CrawlerConfig, http_session: Optional[aiohttp.ClientSession] = None):
         self.config = config
+        # 传入外部共享会话时直接复用，不由本对象关闭；超时改为按请求传入
+        self._shared_session = http_session
+        self._timeout = aiohttp.ClientTimeout(
+            connect=config.connect_timeout,
+            total=config.read_timeout
+        )
         self.rate_limiter = RateLimiter(
             config.requests_per_second,
             config.burst_size
@@ -128,19 +155,33 @@ class CrawlerSession:
         self.proxy_manager = ProxyManager(config.proxy_list) if config.proxy_list else None
         self.user_agent = UserAgent() if config.rotate_user_agent else None
         self.session: Optional[aiohttp.ClientSession] = None
-        self._cache: Dict[str, tuple[Any, float]] = {}  # {url: (data, timestamp)}
-
-    async def __aenter__(self):
-        timeout = aiohttp.ClientTimeout(
-            connect=self.config.connect_timeout,
-            total=self.config.read_timeout
+        # GET 响应体缓存：按 URL + 查询参数区分，LRU 淘汰 + TTL 过期
+        self._cache: Optional[TTLCache] = (
+            TTLCache(maxsize=config.cache_max_entries, ttl=config.cache_ttl) if config.enable_cache else None
         )
-        self.session = aiohttp.ClientSession(timeout=timeout)
+
+    async def open(self) -> "CrawlerSession":
+        """创建底层 aiohttp 会话；已打开时直接复用"""
+        if self._shared_session is not None:
+            self.session = self._shared_session
+        elif self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CRAWLER_CONNECTION_LIMIT,
+                ttl_dns_cache=CRAWLER_DNS_CACHE_TTL,
+            )
+            self.session = aiohttp.ClientSession(timeout=self._timeout, connector=connector)
         return self
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+    async def close(self):
+        if self.session and self.session is not self._shared_session:
             await self.session.close()
+        self.session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
 
     def _get_headers(self) -> Dict[str, str]:
         """生成请求头"""
@@ -153,20 +194,12 @@ class CrawlerSession:
 
         return headers
 
-    def _is_cache_valid(self, url: str) -> bool:
-        """检查缓存是否有效"""
-        if not self.config.enable_cache or url not in self._cache:
-            return False
-
-        _, timestamp = self._cache[url]
-        return time.time() - timestamp < self.config.cache_ttl
-
     async def fetch(
         self,
         url: str,
         method: str = "GET",
         **kwargs
-    ) -> aiohttp.ClientResponse:
+    ) -> CachedResponse:
         """
         执行HTTP请求（带重试、代理、速率限制）
 
@@ -176,13 +209,17 @@ class CrawlerSession:
             **kwargs: 其他请求参数
 
         Returns:
-            响应对象
+            已读取响应体的响应对象
         """
         # 检查缓存
-        if method == "GET" and self._is_cache_valid(url):
-            logger.debug(f"Cache hit for {url}")
-            cached_data, _ = self._cache[url]
-            return cached_data
+        cache_key = None
+        if method == "GET" and self._cache is not None:
+            params = kwargs.get("params")
+            cache_key = (url, tuple(sorted(params.items())) if params else ())
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"Cache hit for {url}")
+                return cached
 
         # 速率限制
         await self.rate_limiter.acquire()
@@ -202,6 +239,7 @@ class CrawlerSession:
                 request_kwargs = {
                     "headers": headers,
                     "proxy": proxy,
+                    "timeout": self._timeout,
                     **kwargs
                 }
 
@@ -209,12 +247,15 @@ class CrawlerSession:
                 logger.debug(f"Fetching {url} (attempt {retry_count + 1}/{self.config.max_retries + 1})")
                 async with self.session.request(method, url, **request_kwargs) as response:
                     response.raise_for_status()
+                    # 在连接释放前读完响应体
+                    body = await response.read()
+                    result = CachedResponse(response.status, body, response.get_encoding())
 
-                    # 缓存成功的GET请求
-                    if method == "GET" and self.config.enable_cache:
-                        self._cache[url] = (response, time.time())
+                # 缓存成功的GET请求
+                if cache_key is not None:
+                    self._cache[cache_key] = result
 
-                    return response
+                return result
 
             except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 last_exception = e
@@ -241,12 +282,12 @@ class CrawlerSession:
     async def fetch_json(self, url: str, **kwargs) -> Dict[str, Any]:
         """获取JSON数据"""
         response = await self.fetch(url, **kwargs)
-        return await response.json()
+        return response.json()
 
     async def fetch_text(self, url: str, **kwargs) -> str:
         """获取文本数据"""
         response = await self.fetch(url, **kwargs)
-        return await response.text()
+        return response.text()
 
 
 class BaseCrawler(ABC):
@@ -254,6 +295,10 @@ class BaseCrawler(ABC):
 
     def __init__(self, config: Optional[CrawlerConfig] = None):
         self.config = config or CrawlerConfig()
+        # 会话（连接池）在多次 run 之间复用，由 aclose 关闭
+        self.session: Optional[CrawlerSession] = None
+        # 外部注入的共享 aiohttp 会话（如 NewsAggregator 的会话）；为 None 时自建连接池
+        self.http_session: Optional[aiohttp.ClientSession] = None
         self.stats = {
             "total_requests": 0,
             "successful_requests": 0,
@@ -273,15 +318,22 @@ class BaseCrawler(ABC):
         self.stats["start_time"] = datetime.now()
 
         try:
-            async with CrawlerSession(self.config) as session:
-                self.session = session
-                results = await self.crawl(**kwargs)
-                self.stats["total_items"] = len(results)
-                return results
+            if self.session is None:
+                self.session = CrawlerSession(self.config, self.http_session)
+            await self.session.open()
+            results = await self.crawl(**kwargs)
+            self.stats["total_items"] = len(results)
+            return results
         finally:
             self.stats["end_time"] = datetime.now()
             self._log_stats()
 
+    async def aclose(self):
+        """关闭复用的会话；下次 run 时按当时的 http_session 重新创建"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+
     def _log_stats(self):
         """记录统计信息"""
         if self.stats["start_time"] and self.stats["end_time"]:
@@ -6,12 +6,20 @@ import asyncio
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta, timezone
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 import feedparser
 import aiohttp
 from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
+# 单个 RSS 源下载解析的超时（秒）
+RSS_FEED_TIMEOUT = 15.0
+# NewsAggregator 共享 HTTP 会话的连接池配置
+NEWS_HTTP_CONNECTION_LIMIT = 100
+NEWS_HTTP_LIMIT_PER_HOST = 10
+NEWS_HTTP_DNS_CACHE_TTL = 300
+
 
 class NewsArticleData:
     """新闻文章数据结构"""
@@ -41,6 +49,18 @@ class NewsArticleData:
 class NewsFetcher(ABC):
     """新闻采集器基类"""
 
+    # 由 NewsAggregator 注入的共享 aiohttp 会话；单独使用采集器时为 None
+    session: Optional[aiohttp.ClientSession] = None
+
+    @asynccontextmanager
+    async def _http_session(self):
+        """优先使用注入的共享会话（不关闭），否则临时创建一个"""
+        if self.session is not None:
+            yield self.session
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
+
     @abstractmethod
     async def fetch_news(
         self, symbol: Optional[str] = None, max_articles: int = 10
@@ -80,11 +100,21 @@ class RSSFeedFetcher(NewsFetcher):
         # 选择相关的RSS源
         feeds_to_fetch = list(self.RSS_FEEDS.items())[:5]  # 限制数量避免超时
 
-        for source_name, feed_url in feeds_to_fetch:
-            try:
-                # 使用feedparser解析RSS
-                feed = await asyncio.to_thread(feedparser.parse, feed_url)
+        # 各 RSS 源相互独立：并发下载解析，单个源超时或失败不拖慢其他源
+        feeds = await asyncio.gather(
+            *(
+                asyncio.wait_for(self._fetch_feed(feed_url), timeout=RSS_FEED_TIMEOUT)
+                for _, feed_url in feeds_to_fetch
+            ),
+            return_exceptions=True,
+        )
 
+        for (source_name, _), feed in zip(feeds_to_fetch, feeds):
+            if isinstance(feed, BaseException):
+                logger.error(f"Failed to fetch RSS feed {source_name}: {feed!r}")
+                continue
+
+            try:
                 for entry in feed.entries[:max_articles]:
                     try:
                         # 解析发布时间
@@ -135,6 +165,14 @@ class RSSFeedFetcher(NewsFetcher):
 
         return articles
 
+    async def _fetch_feed(self, feed_url: str):
+        """经 HTTP 会话下载 RSS 内容，再交给 feedparser 在线程中解析"""
+        async with self._http_session() as session:
+            async with session.get(feed_url) as response:
+                response.raise_for_status()
+                body = await response.read()
+        return await asyncio.to_thread(feedparser.parse, body)
+
     # 公司名称到股票代码的映射
     COMPANY_TO_SYMBOL = {
         "apple": "AAPL",
@@ -228,7 +266,7 @@ class NewsAPIFetcher(NewsFetcher):
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with self._http_session() as session:
                 async with session.get(self.base_url, params=params) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -371,6 +409,37 @@ class NewsAggregator:
                 logger.warning(f"Advanced fetchers not available: {e}")
 
         self._seen_urls = set()  # 增量去重缓存
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        """创建所有采集器共用的 HTTP 会话（连接池 / keep-alive / DNS 缓存跨数据源复用）"""
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=NEWS_HTTP_CONNECTION_LIMIT,
+                limit_per_host=NEWS_HTTP_LIMIT_PER_HOST,
+                ttl_dns_cache=NEWS_HTTP_DNS_CACHE_TTL,
+            )
+        )
+        for fetcher in self.fetchers:
+            fetcher.session = self._session
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """关闭各采集器复用的 HTTP 会话及共享会话"""
+        for fetcher in self.fetchers:
+            aclose = getattr(fetcher, "aclose", None)
+            if aclose is not None:
+                try:
+                    await aclose()
+                except Exception as e:
+                    logger.warning(f"Failed to close {fetcher.__class__.__name__}: {e}")
+            fetcher.session = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
     async def fetch_all_news(
         self, symbol: Optional[str] = None, max_per_source: int = 10, incremental: bool = True
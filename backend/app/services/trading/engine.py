@@ -126,18 +126,12 @@ class TradingEngine:
                 sim_end = sim_end.replace(tzinfo=timezone.utc)
 
             for k in klines:
-                try:
-                    # Handle various datetime formats
-                    k_dt_str = k.datetime.replace("Z", "+00:00")
-                    k_dt = datetime.fromisoformat(k_dt_str)
-                    # Ensure kline datetime is also timezone-aware
-                    if k_dt.tzinfo is None:
-                        k_dt = k_dt.replace(tzinfo=timezone.utc)
-                    if sim_start <= k_dt <= sim_end:
-                        sim_klines.append(k)
-                except (ValueError, AttributeError) as e:
-                    logger.warning(f"Failed to parse kline datetime: {k.datetime}, error: {e}")
-                    continue
+                k_dt = k.datetime
+                # Ensure kline datetime is also timezone-aware
+                if k_dt.tzinfo is None:
+                    k_dt = k_dt.replace(tzinfo=timezone.utc)
+                if sim_start <= k_dt <= sim_end:
+                    sim_klines.append(k)
 
             if len(sim_klines) < 10:
                 # If no data in Feb-Apr 2026 (future), use last 60 days for simulation
@@ -162,7 +156,7 @@ class TradingEngine:
                 # Provide market context (recent price history)
                 lookback = sim_klines[max(0, idx-20):idx+1]
 
-                trade_date_str = kline.datetime[:10]
+                trade_date_str = kline.datetime.strftime("%Y-%m-%d")
                 self._add_log(simulation, "info", f"📅 第 {idx+1}/{len(sim_klines)} 天 ({trade_date_str})")
                 self._add_log(simulation, "info", f"   💹 当前价格: ${kline.close:.2f} | 开盘: ${kline.open:.2f} | 最高: ${kline.high:.2f} | 最低: ${kline.low:.2f}")
 
@@ -196,7 +190,7 @@ class TradingEngine:
                         simulation=simulation,
                         decision=decision,
                         current_price=kline.close,
-                        trade_date=datetime.fromisoformat(kline.datetime.replace("Z", "+00:00")),
+                        trade_date=kline.datetime,
                         market_data=kline,
                         db=db,
                     )
@@ -236,7 +230,7 @@ class TradingEngine:
     ) -> Optional[dict]:
         """Use LLM to make trading decision"""
         # Build context for LLM
-        recent_prices = [f"Date: {k.datetime[:10]}, O:{k.open:.2f}, H:{k.high:.2f}, L:{k.low:.2f}, C:{k.close:.2f}, V:{k.volume or 0}"
+        recent_prices = [f"Date: {k.datetime:%Y-%m-%d}, O:{k.open:.2f}, H:{k.high:.2f}, L:{k.low:.2f}, C:{k.close:.2f}, V:{k.volume or 0}"
                          for k in price_history[-10:]]
 
         current_price = current_kline.close
@@ -257,7 +251,7 @@ class TradingEngine:
 {chr(10).join(recent_prices)}
 
 **Today's Price:**
-- Date: {current_kline.datetime[:10]}
+- Date: {current_kline.datetime:%Y-%m-%d}
 - Open: {current_kline.open:.2f}
 - High: {current_kline.high:.2f}
 - Low: {current_kline.low:.2f}
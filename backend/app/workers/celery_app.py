@@ -1,6 +1,16 @@
+import asyncio
+
 from celery import Celery
 from app.config import settings
 
+# 任务里通过 asyncio.run / new_event_loop 执行异步抓取与交易逻辑；有 uvloop 时改用其事件循环
+# （API 进程由 uvicorn 自动选择 uvloop，无需处理）
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 celery_app = Celery(
     "finance_rag_bot",
     broker=settings.redis_url,
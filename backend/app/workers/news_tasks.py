@@ -38,10 +38,11 @@ def fetch_news_for_symbol(self, symbol: Optional[str] = None, max_articles: int
             sentiment_analyzer = SentimentAnalyzer(model_name="deepseek")
 
             # 获取新闻
-            articles = await aggregator.fetch_all_news(
-                symbol=symbol,
-                max_per_source=max_articles
-            )
+            async with aggregator:
+                articles = await aggregator.fetch_all_news(
+                    symbol=symbol,
+                    max_per_source=max_articles
+                )
 
             if not articles:
                 logger.warning(f"No articles fetched for symbol: {symbol}")
@@ -136,10 +137,11 @@ def fetch_all_market_news(self, max_articles: int = 20):
             sentiment_analyzer = SentimentAnalyzer(model_name="deepseek")
 
             # 获取新闻（不指定symbol，获取所有财经新闻）
-            articles = await aggregator.fetch_all_news(
-                symbol=None,
-                max_per_source=max_articles
-            )
+            async with aggregator:
+                articles = await aggregator.fetch_all_news(
+                    symbol=None,
+                    max_per_source=max_articles
+                )
 
             if not articles:
                 logger.warning("No articles fetched")
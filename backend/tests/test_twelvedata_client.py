@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.market_data.twelvedata import TwelveDataProvider
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keep-alive：连接会留在客户端连接池里，跨事件循环复用时才能复现问题
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+def _run_on_fresh_loop(coro):
+    """与 trading_tasks 一致：每次任务新建事件循环，结束后关闭"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+        asyncio.set_event_loop(None)
+
+
+def test_get_survives_consecutive_event_loops(server_url):
+    provider = TwelveDataProvider()
+
+    async def fetch():
+        resp = await provider._get("binance", server_url, params={}, timeout=5)
+        return resp.status_code, provider._client
+
+    first_status, first_client = _run_on_fresh_loop(fetch())
+    second_status, second_client = _run_on_fresh_loop(fetch())
+
+    assert first_status == 200
+    assert second_status == 200
+    assert second_client is not first_client
+
+
+def test_client_reused_within_one_loop():
+    provider = TwelveDataProvider()
+
+    async def get_twice():
+        first = await provider._get_client()
+        second = await provider._get_client()
+        await provider.aclose()
+        return first, second
+
+    first, second = _run_on_fresh_loop(get_twice())
+    assert first is second
+    assert first.is_closed
+    assert provider._client is None